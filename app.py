@@ -5,20 +5,51 @@ This module provides the application factory pattern for creating Flask app inst
 Routes are organized in separate blueprint modules in the routes package.
 """
 
+from typing import Dict, Optional
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import database
+from compression import init_compression
 from database import init_database, add_sample_data
+from models import Row
+from search_index import enable_ngram_index, disable_ngram_index
 from routes import register_blueprints
 
 
-def create_app():
+class LibraryJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes Book and BorrowRecord rows."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Row):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+
+def create_app(config: Optional[Dict] = None):
     """
     Application factory function to create and configure Flask app.
     
+    Args:
+        config: Optional overrides, e.g. {'DATABASE': 'library.db',
+            'DATABASE_PROFILE': 'throughput', 'SEARCH_BACKEND': 'ngram',
+            'COMPRESS_LEVEL': 6, 'COMPRESS_MIN_SIZE': 500}
+    
     Returns:
         Flask: Configured Flask application instance
     """
     app = Flask(__name__)
+    app.json = LibraryJSONProvider(app)
     app.secret_key = "super secret key"
+    app.config['DATABASE'] = database.DATABASE
+    app.config['DATABASE_PROFILE'] = database.PRAGMA_PROFILE
+    app.config['SEARCH_BACKEND'] = 'fts'  # 'fts' (SQLite) or 'ngram' (in-process index)
+    if config:
+        app.config.update(config)
+    
+    # Point the database layer at the configured file and PRAGMA profile
+    database.DATABASE = app.config['DATABASE']
+    database.set_pragma_profile(app.config['DATABASE_PROFILE'])
     
     # Initialize the database
     init_database()
@@ -26,9 +57,18 @@ def create_app():
     # Add sample data for testing and demonstration
     add_sample_data()
     
+    # Build the in-process search index once the catalog is populated
+    if app.config['SEARCH_BACKEND'] == 'ngram':
+        enable_ngram_index()
+    else:
+        disable_ngram_index()
+    
     # Register all route blueprints
     register_blueprints(app)
     
+    # gzip/deflate HTML and JSON responses for clients that accept it
+    init_compression(app)
+    
     return app
 
 
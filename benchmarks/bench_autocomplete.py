@@ -0,0 +1,40 @@
+"""
+Autocomplete latency of PrefixIndex at 100k and 1M titles.
+
+Usage:
+    python benchmarks/bench_autocomplete.py [sizes...]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_ngram_index import make_books
+from search_index import PrefixIndex
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        books = make_books(size)
+        index = PrefixIndex()
+        index.build(books)
+        rng = random.Random(1)
+        prefixes = [books[rng.randrange(size)]['title'][:rng.randint(1, 8)] for _ in range(10_000)]
+        start = time.perf_counter()
+        for prefix in prefixes:
+            index.complete(prefix, 'title', 10)
+        per_query = (time.perf_counter() - start) / len(prefixes)
+        start = time.perf_counter()
+        for i in range(1000):
+            index.add({'id': size + i + 1, 'title': f'Zz New Title {i}', 'author': 'New Author'})
+        per_add = (time.perf_counter() - start) / 1000
+        print(f'{size:>9} titles: build {index.build_seconds:6.2f}s  '
+              f'complete {per_query * 1e6:7.1f} us/query  add {per_add * 1e6:7.1f} us/book')
+
+
+if __name__ == '__main__':
+    main()
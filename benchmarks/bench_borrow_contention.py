@@ -0,0 +1,82 @@
+"""
+Contention benchmark for the borrow path.
+
+N threads borrow the same book at once, each as a different patron. Compares
+the legacy multi-commit sequence (get_book_by_id, get_patron_borrow_count,
+insert_borrow_record, update_book_availability) with the single-transaction
+borrow_book_atomic, and reports throughput and the final available_copies.
+
+Usage:
+    python benchmarks/bench_borrow_contention.py [borrowers] [copies]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+
+
+def legacy_borrow(patron_id, book_id):
+    book = database.get_book_by_id(book_id)
+    if not book or book['available_copies'] <= 0:
+        return False
+    if database.get_patron_borrow_count(patron_id) >= 5:
+        return False
+    now = datetime.now()
+    database.insert_borrow_record(patron_id, book_id, now, now + timedelta(days=14))
+    database.update_book_availability(book_id, -1)
+    return True
+
+
+def atomic_borrow(patron_id, book_id):
+    now = datetime.now()
+    status, _ = database.borrow_book_atomic(patron_id, book_id, now, now + timedelta(days=14))
+    return status == 'ok'
+
+
+def run(borrow, borrowers, copies):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'bench.db')
+        database.init_database()
+        database.insert_book('Popular Title', 'Author', '9990000000001', copies, copies)
+        book_id = database.get_book_by_isbn('9990000000001')['id']
+
+        successes = []
+        start_barrier = threading.Barrier(borrowers)
+
+        def worker(n):
+            start_barrier.wait()
+            if borrow(f'{n:06d}', book_id):
+                successes.append(n)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(borrowers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        remaining = database.get_book_by_id(book_id)['available_copies']
+        database.close_pool()
+    return elapsed, len(successes), remaining
+
+
+def main():
+    borrowers = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else borrowers // 2
+    print(f'{borrowers} concurrent borrowers, {copies} copies of one book')
+    for name, borrow in (('legacy', legacy_borrow), ('atomic', atomic_borrow)):
+        elapsed, ok, remaining = run(borrow, borrowers, copies)
+        print(f'{name:>7}: {borrowers / elapsed:9.1f} borrows/s  '
+              f'succeeded={ok:<4} available_copies={remaining}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Catalog load throughput: add_book_to_catalog per row vs bulk import.
+
+Loads N generated books into a fresh temporary database twice, once through
+add_book_to_catalog (a duplicate lookup and a commit per book) and once
+through bulk_import.import_books (executemany, one transaction per batch),
+and prints rows/sec for each.
+
+Usage:
+    python benchmarks/bench_bulk_import.py [books] [batch_size]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+from bulk_import import import_books, iter_records
+from library_service import add_book_to_catalog
+
+
+def generate_csv(count):
+    lines = ['title,author,isbn,total_copies']
+    lines.extend(f'Title {i:07d},Author {i % 5000},{9780000000000 + i},3' for i in range(count))
+    return '\n'.join(lines) + '\n'
+
+
+def fresh_database(tmp, name):
+    database.close_pool()
+    database.DATABASE = os.path.join(tmp, name)
+    database.init_database()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_database(tmp, 'single.db')
+        start = time.perf_counter()
+        for i in range(count):
+            add_book_to_catalog(f'Title {i:07d}', f'Author {i % 5000}', f'{9780000000000 + i}', 3)
+        elapsed = time.perf_counter() - start
+        print(f'add_book_to_catalog    {count} rows in {elapsed:7.2f}s  {count / elapsed:10.0f} rows/sec')
+
+        fresh_database(tmp, 'bulk.db')
+        stats = import_books(iter_records(io.StringIO(generate_csv(count)), 'csv'), batch_size)
+        print(f"import_books ({batch_size:>6})  {stats['inserted']} rows in {stats['elapsed_seconds']:7.2f}s  "
+              f"{stats['rows_per_second']:10.0f} rows/sec")
+        database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Catalog render time with and without cached row fragments.
+
+For each catalog size, seeds a temporary database and renders every book as
+catalog table rows four ways inside a request context:
+    inline     one Jinja loop calling the catalog_row macro per book (no cache)
+    cold       render_catalog_row with an empty fragment cache
+    warm       render_catalog_row with every fragment cached
+    1% dirty   warm, after 1% of the books had a copy borrowed
+Then renders the full catalog.html page from the warm fragments.
+
+Usage:
+    python benchmarks/bench_catalog_fragments.py [books ...]   (default 10000 100000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import render_template
+
+import database
+from app import create_app
+from routes import fragments
+
+INLINE = '{% from "catalog_row.html" import catalog_row %}{% for book in books %}{{ catalog_row(book) }}{% endfor %}'
+
+
+def seed(count):
+    with database.db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ((f'Title {i:07d}', f'Author {i % 5000}', f'{9780000000000 + i}', 3, 3) for i in range(count)))
+        conn.commit()
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f'  {label:<18} {(time.perf_counter() - start) * 1000:9.1f} ms')
+    return result
+
+
+def rows(books):
+    return ''.join(fragments.iter_catalog_rows(books))
+
+
+def run(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'fragments.db')
+        database.init_database()
+        seed(count)
+        app = create_app({'DATABASE': database.DATABASE, 'COMPRESS_LEVEL': 0})
+        fragments._row_cache = fragments.LRUCache(count)
+        print(f'{count} books')
+        with app.test_request_context():
+            books = database.get_all_books()
+            inline = app.jinja_env.from_string(INLINE)
+            expected = timed('inline', lambda: inline.render(books=books))
+            timed('cold', lambda: rows(books))
+            assert timed('warm', lambda: rows(books)) == expected
+
+            for book_id in range(1, count + 1, 100):
+                database.update_book_availability(book_id, -1)
+            books = database.get_all_books()
+            timed('1% dirty', lambda: rows(books))
+            page = {'prev_cursor': None, 'next_cursor': None}
+            timed('page (warm)', lambda: render_template(
+                'catalog.html', rows=fragments.iter_catalog_rows(books), page=page, limit=count))
+        stats = fragments.get_catalog_row_cache_stats()
+        print(f"  fragment cache: {stats['hits']} hits, {stats['misses']} misses")
+        database.close_pool()
+
+
+def main():
+    for count in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
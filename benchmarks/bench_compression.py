@@ -0,0 +1,77 @@
+"""
+Bytes saved and CPU cost of response compression per request.
+
+Seeds a temporary database with N books, then requests a catalog page, a
+search page and an /api/search page through the test client with no
+Accept-Encoding and with gzip and deflate at several levels. Reports the
+response size and bytes saved, plus the CPU time per request spent
+compressing: the identity body is compressed repeatedly with the same
+settings, since end-to-end timings are dominated by rendering noise.
+
+Usage:
+    python benchmarks/bench_compression.py [books] [requests]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+from app import create_app
+from compression import CONTENT_CODINGS
+
+URLS = ['/catalog?limit=200', '/search?q=title&type=title&limit=100', '/api/search?q=title&limit=100']
+LEVELS = [1, 6, 9]
+
+
+def seed(count):
+    with database.db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ((f'Title {i:07d}', f'Author {i % 5000}', f'{9780000000000 + i}', 3, 3) for i in range(count)))
+        conn.commit()
+
+
+def fetch_body(client, url, encoding):
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    return client.get(url, headers=headers).get_data()
+
+
+def compress_cpu(body, encoding, level, requests):
+    start = time.process_time()
+    for _ in range(requests):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, CONTENT_CODINGS[encoding])
+        compressor.compress(body)
+        compressor.flush()
+    return (time.process_time() - start) / requests
+
+
+def main():
+    books = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'compress.db')
+        database.init_database()
+        seed(books)
+        clients = {level: create_app({'DATABASE': database.DATABASE, 'COMPRESS_LEVEL': level}).test_client()
+                   for level in LEVELS}
+        print(f'{books} books, {requests} requests per row')
+        for url in URLS:
+            body = fetch_body(clients[LEVELS[0]], url, None)
+            print(f'{url}  identity {len(body)} B')
+            for encoding in CONTENT_CODINGS:
+                for level in LEVELS:
+                    saved = len(body) - len(fetch_body(clients[level], url, encoding))
+                    cpu = compress_cpu(body, encoding, level, requests)
+                    print(f'  {encoding:<7} -{level}  saved {saved:8d} B ({saved / len(body):4.0%})  '
+                          f'{cpu * 1000:7.3f} ms CPU/request')
+        database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Throughput of the batch late fee engine.
+
+Generates N synthetic loans and times calculate_late_fees on the NumPy path
+(if installed) and the pure-Python path, checking both agree.
+
+Usage:
+    python benchmarks/bench_fee_engine.py [loans] [python_loans]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fee_engine
+from fee_engine import MICROSECONDS_PER_DAY, NOT_RETURNED, calculate_late_fees, to_epoch_us
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    python_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    now = datetime.now()
+    now_us = to_epoch_us(now)
+
+    if fee_engine.np is not None:
+        np = fee_engine.np
+        rng = np.random.default_rng(11)
+        due = now_us - rng.integers(-20, 60, count) * MICROSECONDS_PER_DAY - rng.integers(0, MICROSECONDS_PER_DAY, count)
+        returned = due + rng.integers(-10 * MICROSECONDS_PER_DAY, 40 * MICROSECONDS_PER_DAY, count)
+        returned[rng.random(count) < 0.3] = NOT_RETURNED
+        start = time.perf_counter()
+        days, fees = calculate_late_fees(due, returned, now=now, use_numpy=True)
+        elapsed = time.perf_counter() - start
+        print(f'numpy : {count:>10} loans in {elapsed:6.2f}s  ({count / elapsed / 1e6:6.1f} M loans/s)  '
+              f'total fees ${fees.sum():,.2f}')
+        due_list = due[:python_count].tolist()
+        returned_list = returned[:python_count].tolist()
+    else:
+        print('numpy : not installed')
+        import random
+        rng = random.Random(11)
+        due_list = [now_us - rng.randint(-20, 60) * MICROSECONDS_PER_DAY for _ in range(python_count)]
+        returned_list = [NOT_RETURNED if rng.random() < 0.3 else d + rng.randint(-10, 40) * MICROSECONDS_PER_DAY
+                         for d in due_list]
+
+    start = time.perf_counter()
+    py_days, py_fees = calculate_late_fees(due_list, returned_list, now=now, use_numpy=False)
+    elapsed = time.perf_counter() - start
+    print(f'python: {python_count:>10} loans in {elapsed:6.2f}s  ({python_count / elapsed / 1e6:6.1f} M loans/s)')
+    if fee_engine.np is not None:
+        assert py_days == days[:python_count].tolist()
+        assert py_fees == fees[:python_count].tolist()
+        print('python and numpy results identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Build time, memory and query latency of the in-process n-gram index.
+
+Indexes N synthetic books and compares NgramIndex.search with the original
+R6 linear scan over the same data.
+
+Usage:
+    python benchmarks/bench_ngram_index.py [books]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from search_index import NgramIndex
+
+WORDS = ('river night garden silent empire shadow winter glass house stone '
+         'crown letters ocean forest city kingdom secret dream iron fire').split()
+SURNAMES = ('Smith Garcia Okafor Tanaka Novak Haddad Larsen Moreau Silva Kowalski').split()
+
+
+def make_books(count, seed=7):
+    rng = random.Random(seed)
+    return [{
+        'id': i + 1,
+        'title': ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 5))) + f' {i}',
+        'author': f'{rng.choice(WORDS).title()} {rng.choice(SURNAMES)}',
+    } for i in range(count)]
+
+
+def linear_scan(books, term, field):
+    term = term.lower()
+    return [b['id'] for b in books if term in b[field].lower()]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    books = make_books(count)
+    index = NgramIndex()
+    index.build(books)
+    stats = index.stats()
+    print(f'{count} books indexed in {stats["build_seconds"]:.2f}s; '
+          f'{stats["ngrams"]} n-grams, {stats["postings"]} postings, '
+          f'{stats["posting_bytes"] / 2**20:.1f} MiB posting arrays, '
+          f'{stats["text_bytes"] / 2**20:.1f} MiB lowered text')
+    queries = [('title', 'silent gard'), ('title', f'{count // 2}'), ('author', 'okafor'), ('title', 'crown')]
+    for field, term in queries:
+        index_time, hits = timed(lambda: index.search(term, field), 20)
+        scan_time, expected = timed(lambda: linear_scan(books, term, field), 3)
+        assert sorted(hits) == sorted(expected)
+        print(f'{field:>6} {term!r:>15}: {len(hits):7} hits  index {index_time * 1e3:8.3f} ms  '
+              f'scan {scan_time * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
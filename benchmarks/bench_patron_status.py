@@ -0,0 +1,129 @@
+"""
+Before/after latency of get_patron_status_report for long histories.
+
+"Before" is the original three-query report (current loans, loan count and
+history each read separately, every date parsed in Python). "After" is the
+single-pass library_service.get_patron_status_report with its report cache
+emptied before every call, and "cached" is the same call served from a warm
+cache, pricing only the open loans.
+
+Usage:
+    python benchmarks/bench_patron_status.py [history_rows] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+import library_service
+from database import (
+    backfill_epoch_columns, get_db_connection, get_patron_borrow_count, get_patron_borrowed_books,
+    rebuild_patron_ledger
+)
+from fee_engine import late_fee_for_days
+from library_service import get_patron_status_report
+
+PATRON = '424242'
+
+
+def legacy_status_report(patron_id):
+    borrowed_books = get_patron_borrowed_books(patron_id)
+    num_borrowed = get_patron_borrow_count(patron_id)
+    conn = get_db_connection()
+    history_records = conn.execute('''
+        SELECT br.*, b.title, b.author FROM borrow_records br
+        JOIN books b ON br.book_id = b.id
+        WHERE br.patron_id = ?
+        ORDER BY br.borrow_date DESC
+    ''', (patron_id,)).fetchall()
+    conn.close()
+    history = []
+    total_late_fees = 0.0
+    for record in history_records:
+        due_date = datetime.fromisoformat(record['due_date'])
+        return_date = datetime.fromisoformat(record['return_date']) if record['return_date'] else None
+        days_overdue = 0
+        if return_date and return_date > due_date:
+            days_overdue = (return_date - due_date).days
+        elif not return_date and datetime.now() > due_date:
+            days_overdue = (datetime.now() - due_date).days
+        fee = late_fee_for_days(days_overdue)
+        total_late_fees += fee
+        history.append({
+            'book_id': record['book_id'],
+            'title': record['title'],
+            'author': record['author'],
+            'borrow_date': record['borrow_date'],
+            'due_date': record['due_date'],
+            'return_date': record['return_date'],
+            'late_fee': round(fee, 2),
+            'days_overdue': days_overdue
+        })
+    return {
+        'currently_borrowed': borrowed_books,
+        'num_borrowed': num_borrowed,
+        'total_late_fees': round(total_late_fees, 2),
+        'borrowing_history': history
+    }
+
+
+def seed(rows):
+    now = datetime.now()
+    with database.db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(f'Title {i}', f'Author {i}', f'{9780000000000 + i}', 5, 5) for i in range(200)])
+        records = []
+        for i in range(rows):
+            borrowed = now - timedelta(days=rows - i, hours=i % 24)
+            due = borrowed + timedelta(days=14)
+            returned = None if i >= rows - 5 else (due + timedelta(days=(i % 30) - 10)).isoformat()
+            records.append((PATRON, i % 200 + 1, borrowed.isoformat(), due.isoformat(), returned))
+        conn.executemany('''
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date)
+            VALUES (?, ?, ?, ?, ?)
+        ''', records)
+        conn.commit()
+    rebuild_patron_ledger()
+    backfill_epoch_columns(batch_size=5000)
+
+
+def uncached_status_report(patron_id):
+    library_service._patron_report_cache.clear()
+    return get_patron_status_report(patron_id)
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn(PATRON)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'status.db')
+        database.init_database()
+        seed(rows)
+        before, old = timed(legacy_status_report, repeats)
+        after, new = timed(uncached_status_report, repeats)
+        library_service.PATRON_REPORT_MAX_LOANS = rows
+        cached, warm = timed(get_patron_status_report, repeats)
+        database.close_pool()
+    assert old['total_late_fees'] == new['total_late_fees']
+    assert old['num_borrowed'] == new['num_borrowed']
+    assert warm == new
+    print(f'{rows} history rows: before {before * 1e3:8.1f} ms  after {after * 1e3:8.1f} ms  '
+          f'({before / after:4.1f}x)  cached {cached * 1e3:8.1f} ms  ({before / cached:4.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Mixed read/write throughput for each PRAGMA profile.
+
+Reader threads page through the catalog and look up books by ID while writer
+threads borrow and return copies, all against a fresh database per profile.
+Reports completed reads/s, writes/s and lock errors.
+
+Usage:
+    python benchmarks/bench_pragma_profiles.py [seconds] [readers] [writers]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+
+BOOKS = 2000
+
+
+def seed():
+    with database.db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(f'Title {i:05d}', f'Author {i % 97}', f'{9780000000000 + i}', 5, 5) for i in range(BOOKS)])
+        conn.commit()
+
+
+def run_profile(profile, seconds, readers, writers):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, f'{profile}.db')
+        database.set_pragma_profile(profile)
+        database.init_database()
+        seed()
+
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        stop = time.perf_counter() + seconds
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            rng = random.Random()
+            while time.perf_counter() < stop:
+                try:
+                    if rng.random() < 0.1:
+                        database.get_all_books()
+                    else:
+                        database.get_book_by_id(rng.randint(1, BOOKS))
+                    count('reads')
+                except sqlite3.OperationalError:
+                    count('errors')
+
+        def writer(n):
+            rng = random.Random(n)
+            patron_id = f'{n:06d}'
+            while time.perf_counter() < stop:
+                book_id = rng.randint(1, BOOKS)
+                now = datetime.now()
+                status, _ = database.borrow_book_atomic(patron_id, book_id, now, now + timedelta(days=14))
+                if status == 'ok':
+                    database.return_book_atomic(patron_id, book_id, datetime.now())
+                    count('writes')
+                elif status == 'error':
+                    count('errors')
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        database.close_pool()
+    return counts
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    print(f'{seconds:.0f}s per profile, {readers} readers, {writers} writers, {BOOKS} books')
+    for profile in database.PRAGMA_PROFILES:
+        counts = run_profile(profile, seconds, readers, writers)
+        print(f'{profile:>10}: {counts["reads"] / seconds:9.1f} reads/s  '
+              f'{counts["writes"] / seconds:8.1f} borrow+return/s  errors={counts["errors"]}')
+
+
+if __name__ == '__main__':
+    main()
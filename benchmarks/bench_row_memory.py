@@ -0,0 +1,85 @@
+"""
+Memory held by a loaded catalog and by borrow records, dicts vs row types.
+
+Seeds a temporary database with N books and measures, with tracemalloc, the
+peak and retained memory of loading the whole catalog the old way (fetchall
+into sqlite3.Row, then one dict per row) and with get_all_books() (Book
+instances built off a tuple cursor). Borrow records are compared as eagerly
+parsed dicts against BorrowRecord in eager and lazy date modes.
+
+Usage:
+    python benchmarks/bench_row_memory.py [books] [borrow_records]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import database
+from database import get_all_books
+from models import BorrowRecord
+
+
+def measure(label, fn):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} retained {retained / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB  '
+          f'{elapsed:6.2f}s')
+    return result
+
+
+def legacy_all_books():
+    with database.db_connection() as conn:
+        books = conn.execute('SELECT * FROM books ORDER BY title COLLATE NOCASE').fetchall()
+    return [dict(book) for book in books]
+
+
+def seed_books(count):
+    with database.db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ((f'Title {i:07d}', f'Author {i % 5000}', f'{9780000000000 + i}', 3, 3) for i in range(count)))
+        conn.commit()
+
+
+def main():
+    books = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'rows.db')
+        database.init_database()
+        seed_books(books)
+        print(f'{books} books')
+        old = measure('dict per row', legacy_all_books)
+        del old
+        new = measure('Book (get_all_books)', get_all_books)
+        del new
+        database.close_pool()
+
+    now = datetime.now()
+    rows = [(i, f'{i % 900000 + 100000}', i % books + 1, (now - timedelta(days=i % 60)).isoformat(),
+             (now - timedelta(days=i % 60 - 14)).isoformat(), None) for i in range(records)]
+    print(f'{records} borrow records')
+    measure('dict, dates parsed', lambda: [{
+        'id': r[0], 'patron_id': r[1], 'book_id': r[2],
+        'borrow_date': datetime.fromisoformat(r[3]), 'due_date': datetime.fromisoformat(r[4]),
+        'return_date': None,
+    } for r in rows])
+    measure('BorrowRecord, eager dates', lambda: [BorrowRecord(*r, lazy=False) for r in rows])
+    measure('BorrowRecord, lazy dates', lambda: [BorrowRecord(*r, lazy=True) for r in rows])
+
+
+if __name__ == '__main__':
+    main()
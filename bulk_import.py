@@ -0,0 +1,175 @@
+"""
+Bulk Catalog Import - Load many books from CSV or JSONL in large transactions
+Streams records from the input, applies the R1 validation rules, drops ISBNs
+already seen in the file or present in the catalog, and inserts the rest with
+executemany one batch per transaction. Rejected records are reported with
+their line number and reason.
+
+Input records have title, author, isbn and total_copies fields (a CSV header
+row, or one JSON object per line).
+
+Usage:
+    library-import books.csv [--format csv|jsonl] [--batch-size 5000]
+                   [--rejects rejects.csv]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import database
+from database import insert_books_bulk
+from library_service import validate_book_fields
+
+REJECT_FIELDS = ['line', 'isbn', 'reason']
+
+
+def iter_csv_records(stream: TextIO) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """Yield (line number, record) for each row of a CSV file with a header row."""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def iter_jsonl_records(stream: TextIO) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """Yield (line number, record) for each non-blank line; record is None if it is not a JSON object."""
+    for line_num, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_num, record if isinstance(record, dict) else None
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """Yield (line number, record) pairs from a CSV or JSONL stream."""
+    if fmt == 'csv':
+        return iter_csv_records(stream)
+    if fmt == 'jsonl':
+        return iter_jsonl_records(stream)
+    raise ValueError(f'Unknown input format: {fmt!r}')
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def parse_record(record: Optional[Dict]) -> Tuple[Optional[Tuple[str, str, str, int, int]], str]:
+    """
+    Turn an input record into a books row.
+
+    Returns:
+        tuple: ((title, author, isbn, total_copies, available_copies), '') or
+        (None, rejection reason)
+    """
+    if record is None:
+        return None, 'Record is not a JSON object.'
+    title, author, isbn = _text(record.get('title')), _text(record.get('author')), _text(record.get('isbn'))
+    total_copies = record.get('total_copies')
+    if isinstance(total_copies, str) and total_copies.strip().isdigit():
+        total_copies = int(total_copies)
+    elif isinstance(total_copies, bool):
+        total_copies = None
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return None, error
+    return (title, author, isbn, total_copies, total_copies), ''
+
+
+def import_books(records: Iterable[Tuple[int, Optional[Dict]]], batch_size: int = 5000,
+                 on_reject: Optional[Callable[[Dict], None]] = None,
+                 progress: Optional[TextIO] = None) -> Dict:
+    """
+    Validate and insert books, batch_size rows per transaction.
+
+    Args:
+        records: (line number, record) pairs, e.g. from iter_records()
+        batch_size: Valid rows inserted per transaction
+        on_reject: Called with {'line', 'isbn', 'reason'} for every rejected record
+        progress: Optional stream for rows/sec progress, at most once a second
+
+    Returns:
+        dict: rows, inserted, rejected, elapsed_seconds, rows_per_second
+    """
+    stats = {'rows': 0, 'inserted': 0, 'rejected': 0}
+    start = last_report = time.perf_counter()
+    seen = set()
+    batch: List[Tuple[str, str, str, int, int]] = []
+    batch_lines: Dict[str, int] = {}
+
+    def reject(line: int, isbn: str, reason: str):
+        stats['rejected'] += 1
+        if on_reject is not None:
+            on_reject({'line': line, 'isbn': isbn, 'reason': reason})
+
+    def flush():
+        existing = insert_books_bulk(batch)
+        for isbn in sorted(existing, key=batch_lines.get):
+            reject(batch_lines[isbn], isbn, 'A book with this ISBN already exists.')
+        stats['inserted'] += len(batch) - len(existing)
+        batch.clear()
+        batch_lines.clear()
+
+    for line, record in records:
+        stats['rows'] += 1
+        book, error = parse_record(record)
+        if book is None:
+            reject(line, _text(record.get('isbn')) if record else '', error)
+        elif book[2] in seen:
+            reject(line, book[2], 'Duplicate ISBN in import.')
+        else:
+            seen.add(book[2])
+            batch.append(book)
+            batch_lines[book[2]] = line
+            if len(batch) >= batch_size:
+                flush()
+                now = time.perf_counter()
+                if progress is not None and now - last_report >= 1.0:
+                    progress.write(f"{stats['rows']} rows, {stats['inserted']} inserted, "
+                                   f"{stats['rows'] / (now - start):.0f} rows/sec\n")
+                    last_report = now
+    if batch:
+        flush()
+
+    stats['elapsed_seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] else 0.0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for library-import; exits 1 if any record was rejected."""
+    parser = argparse.ArgumentParser(prog='library-import', description='Bulk import books into the catalog.')
+    parser.add_argument('input', help="CSV or JSONL file, or '-' for stdin")
+    parser.add_argument('--database', default=database.DATABASE, help='SQLite database file')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default=None,
+                        help='input format (default: from the file extension, else csv)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows inserted per transaction')
+    parser.add_argument('--rejects', default='-', help="rejection report CSV, or '-' for stdout")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('jsonl' if args.input.endswith(('.jsonl', '.ndjson')) else 'csv')
+    database.DATABASE = args.database
+    database.init_database()
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    rejects = sys.stdout if args.rejects == '-' else open(args.rejects, 'w', newline='')
+    try:
+        writer = csv.DictWriter(rejects, fieldnames=REJECT_FIELDS)
+        writer.writeheader()
+        stats = import_books(iter_records(source, fmt), args.batch_size, writer.writerow, progress=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if rejects is not sys.stdout:
+            rejects.close()
+    print(f"Imported {stats['inserted']} of {stats['rows']} books ({stats['rejected']} rejected) "
+          f"in {stats['elapsed_seconds']:.2f}s, {stats['rows_per_second']:.0f} rows/sec", file=sys.stderr)
+    return 1 if stats['rejected'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Response Compression - gzip/deflate for HTML and JSON responses
+Negotiates a content coding from Accept-Encoding in an after_request hook and
+compresses the body with zlib. Buffered bodies under COMPRESS_MIN_SIZE bytes
+are sent as is; streamed bodies are compressed as they are produced, with a
+sync flush after the first chunk and then every COMPRESS_FLUSH_BYTES of input
+so the client still receives the page progressively.
+
+Configuration (app.config):
+    COMPRESS_LEVEL     zlib level 1-9, or 0 to turn compression off (default 6)
+    COMPRESS_MIN_SIZE  smallest buffered body worth compressing (default 500)
+"""
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, request
+
+# Content codings in order of preference, with the zlib wbits producing each;
+# HTTP "deflate" is the zlib format, not raw deflate
+CONTENT_CODINGS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/x-ndjson', 'application/javascript',
+}
+
+COMPRESS_FLUSH_BYTES = 16384
+
+
+def negotiate_coding() -> Optional[str]:
+    """Return the content coding to use for the current request, or None for identity."""
+    return request.accept_encodings.best_match(list(CONTENT_CODINGS))
+
+
+def _compressor(coding: str, level: int):
+    return zlib.compressobj(level, zlib.DEFLATED, CONTENT_CODINGS[coding])
+
+
+def _compress_stream(chunks: Iterable, coding: str, level: int) -> Iterator[bytes]:
+    compressor = _compressor(coding, level)
+    pending = 0
+    first = True
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if first or pending >= COMPRESS_FLUSH_BYTES:
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+                first = False
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # Streamed views hold a request context (and database cursors) until closed
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: compress the response body if the client and content allow it."""
+    level = current_app.config.get('COMPRESS_LEVEL', 6)
+    if (not level or request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers or response.direct_passthrough):
+        return response
+    response.vary.add('Accept-Encoding')
+    coding = negotiate_coding()
+    if coding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, coding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config.get('COMPRESS_MIN_SIZE', 500):
+            return response
+        compressor = _compressor(coding, level)
+        response.set_data(compressor.compress(data) + compressor.flush())
+    response.headers['Content-Encoding'] = coding
+
+    # A strong ETag names exact bytes, so each coding gets its own
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{coding}', weak)
+    return response
+
+
+def init_compression(app: Flask):
+    """Register response compression on an app, keeping any configured settings."""
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.after_request(compress_response)
@@ -3,239 +3,1162 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import os
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from fee_engine import days_overdue_between, late_fee_for_days, to_epoch_us
+from models import Book, BorrowRecord
 
 # Database configuration
 DATABASE = 'library.db'
+POOL_MAX_SIZE = 8          # Maximum number of open connections per process
+POOL_TIMEOUT = 5.0         # Seconds to wait for a free connection before failing
+PRAGMA_PROFILE = 'durable' # Name of the PRAGMA_PROFILES entry applied to new connections
+LAZY_DATES = True          # BorrowRecord date columns are parsed on first access, not on read
+
+# PRAGMA settings applied to every new connection, in order.
+# journal_mode=WAL lets catalog readers proceed while a borrow commits, and
+# busy_timeout makes concurrent writers wait for the lock instead of failing.
+PRAGMA_PROFILES = {
+    'durable': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,       # KiB when negative
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'throughput': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+    # journal_mode is stored in the database file, so the test profile leaves
+    # it as it is rather than switching a shared library.db out of WAL
+    'test': {
+        'busy_timeout': 5000,
+        'synchronous': 'OFF',
+        'cache_size': -8000,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+def apply_pragmas(conn: sqlite3.Connection, profile: str):
+    """Apply the named PRAGMA profile to a connection."""
+    for name, value in PRAGMA_PROFILES[profile].items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def set_pragma_profile(profile: str):
+    """Select the PRAGMA profile used for new connections and recycle the pool."""
+    global PRAGMA_PROFILE
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f'Unknown PRAGMA profile: {profile!r}')
+    PRAGMA_PROFILE = profile
+    close_pool()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection that returns itself to its pool on close().
+
+    Existing callers that do ``conn = get_db_connection(); ...; conn.close()``
+    keep working unchanged; close() simply checks the connection back in.
+    """
+
+    pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def discard(self):
+        """Really close the underlying SQLite handle."""
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable SQLite connections.
+
+    Connections are checked out with acquire() (or the connection() context
+    manager) and checked back in with release(). Idle connections are reused
+    LIFO so the warmest page cache is handed out first. The pool remembers the
+    PID that created it and drops inherited connections after a fork, so it is
+    safe to create before a pre-forking server spawns its workers.
+    """
+
+    def __init__(self, database: str, max_size: int = POOL_MAX_SIZE, timeout: float = POOL_TIMEOUT,
+                 profile: Optional[str] = None):
+        self.database = database
+        self.profile = profile
+        self.max_size = max_size
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle: List[PooledConnection] = []
+        self._open = 0
+        self._closed = False
+        self._pid = os.getpid()
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'wait_time': 0.0, 'timeouts': 0}
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(self.database, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        if self.profile:
+            apply_pragmas(conn, self.profile)
+        conn.pool = self
+        return conn
+
+    def _check_pid(self):
+        # Connections inherited across fork() must never be used by the child.
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, opening a new one if the pool is not full."""
+        self._check_pid()
+        with self._cond:
+            if not self._idle and self._open >= self.max_size:
+                self._stats['waits'] += 1
+                start = time.perf_counter()
+                ready = self._cond.wait_for(lambda: self._idle or self._open < self.max_size, self.timeout)
+                self._stats['wait_time'] += time.perf_counter() - start
+                if not ready:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError('Timed out waiting for a database connection.')
+            if self._idle:
+                self._stats['hits'] += 1
+                return self._idle.pop()
+            self._stats['misses'] += 1
+            self._open += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: PooledConnection):
+        """Return a connection to the pool, rolling back anything left open."""
+        if conn.pool is not self:
+            return
+        if self._pid != os.getpid():
+            conn.pool = None
+            return
+        if self._closed:
+            conn.discard()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            if conn in self._idle:
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection. Checked-out connections close on release."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._closed = True
+        for conn in idle:
+            conn.discard()
+
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process without touching them."""
+        # The parent's lock may have been held at fork time, so replace it
+        # rather than acquiring it.
+        self._cond = threading.Condition()
+        for conn in self._idle:
+            conn.pool = None
+        self._idle = []
+        self._open = 0
+        self._pid = os.getpid()
+
+    def stats(self) -> Dict:
+        """Return hit/miss/wait counters and current pool occupancy."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+            stats['open'] = self._open
+            stats['max_size'] = self.max_size
+        return stats
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool for the configured DATABASE."""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.database == DATABASE and pool.profile == PRAGMA_PROFILE:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.database != DATABASE or _pool.profile != PRAGMA_PROFILE:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DATABASE, profile=PRAGMA_PROFILE)
+        return _pool
+
+
+def _reset_pool_in_child():
+    if _pool is not None:
+        _pool.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pool_in_child)
+
 
 def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
-    return conn
+    """Get a pooled database connection. Call close() to return it to the pool."""
+    return get_pool().acquire()
 
-def init_database():
-    """Initialize the database with required tables."""
-    conn = get_db_connection()
-    
-    # Create books table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            author TEXT NOT NULL,
-            isbn TEXT UNIQUE NOT NULL,
-            total_copies INTEGER NOT NULL,
-            available_copies INTEGER NOT NULL
+
+@contextmanager
+def db_connection() -> Iterator[sqlite3.Connection]:
+    """Context manager yielding a pooled connection for the duration of the block."""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def get_pool_stats() -> Dict:
+    """Get connection pool hit/miss/wait statistics."""
+    return get_pool().stats()
+
+
+def close_pool():
+    """Close all idle pooled connections (e.g. on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+# Secondary indexes for the hot lookup paths, created by ensure_indexes().
+# Existing databases only pick up a new entry through a migration that calls
+# ensure_indexes() again.
+# borrow_records lookups by (patron, book) newest-first, active-loan lookups
+# through a partial index, a patron's history by borrow date, and the
+# catalog's case-insensitive title order. Active-loan queries pin the partial
+# index with INDEXED BY, since the planner would otherwise favour the newer
+# history index on ties. Migration 6 drops the two borrow_date indexes again
+# in favour of their EPOCH_INDEXES counterparts.
+INDEXES = {
+    'idx_borrow_records_patron_book_date': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_book_date
+        ON borrow_records (patron_id, book_id, borrow_date)
+    ''',
+    'idx_borrow_records_active': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active
+        ON borrow_records (patron_id, book_id)
+        WHERE return_date IS NULL
+    ''',
+    'idx_borrow_records_patron_date': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_date
+        ON borrow_records (patron_id, borrow_date)
+    ''',
+    'idx_books_title_nocase': '''
+        CREATE INDEX IF NOT EXISTS idx_books_title_nocase
+        ON books (title COLLATE NOCASE)
+    ''',
+}
+
+def ensure_indexes(conn: sqlite3.Connection):
+    """Create any missing indexes from INDEXES on an open connection."""
+    for ddl in INDEXES.values():
+        conn.execute(ddl)
+
+# Full-text index over books(title, author). The trigram tokenizer keeps R6's
+# case-insensitive substring semantics while letting SQLite answer the match
+# from the index; triggers keep it in sync with the books table.
+SEARCH_INDEX_DDL = [
+    '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            title, author, content='books', content_rowid='id', tokenize='trigram'
         )
-    ''')
-    
-    # Create borrow_records table
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS borrow_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            patron_id TEXT NOT NULL,
-            book_id INTEGER NOT NULL,
-            borrow_date TEXT NOT NULL,
-            due_date TEXT NOT NULL,
-            return_date TEXT,
-            FOREIGN KEY (book_id) REFERENCES books (id)
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''',
+]
+FTS_MIN_TERM_LENGTH = 3    # Trigram index cannot answer shorter terms
+
+_fts_enabled: Dict[str, bool] = {}
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the books_fts index and its triggers if SQLite supports them.
+
+    Returns:
+        bool: True if full-text search is available on this database
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).fetchone()
+    try:
+        for ddl in SEARCH_INDEX_DDL:
+            conn.execute(ddl)
+        if not exists:
+            # Index books that were added before the FTS table existed
+            conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or without the trigram tokenizer
+        _fts_enabled[DATABASE] = False
+        return False
+    _fts_enabled[DATABASE] = True
+    return True
+
+# Single-row table holding a catalog version that every change to books bumps.
+# Caches of catalog-derived data compare it to decide whether they are stale.
+CATALOG_VERSION_DDL = [
+    '''
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''',
+    '''
+        INSERT OR IGNORE INTO catalog_meta (id, version, updated_at)
+        VALUES (1, 0, strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+    ''',
+] + [
+    f'''
+        CREATE TRIGGER IF NOT EXISTS books_catalog_version_{event.lower()} AFTER {event} ON books BEGIN
+            UPDATE catalog_meta
+            SET version = version + 1, updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now')
+            WHERE id = 1;
+        END
+    '''
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+# Per-patron running totals kept in step with borrow_records by every write
+# helper, inside the same transaction as the borrow or return it reflects.
+# accrued_fees covers returned loans only; fees on open loans depend on the
+# clock and are added when read. last_activity is the latest borrow or return
+# date seen for the patron.
+PATRON_LEDGER_DDL = [
+    '''
+        CREATE TABLE IF NOT EXISTS patrons (
+            patron_id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL
         )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS patron_ledger (
+            patron_id TEXT PRIMARY KEY REFERENCES patrons (patron_id),
+            active_loans INTEGER NOT NULL DEFAULT 0,
+            total_loans INTEGER NOT NULL DEFAULT 0,
+            accrued_fees REAL NOT NULL DEFAULT 0,
+            last_activity TEXT
+        )
+    ''',
+]
+
+LEDGER_FIELDS = ('active_loans', 'total_loans', 'accrued_fees', 'last_activity')
+
+def _ledger_record_borrow(conn: sqlite3.Connection, patron_id: str, borrow_date: str):
+    """Count a new loan in the patron's ledger row, creating the patron if needed."""
+    conn.execute('''
+        INSERT INTO patrons (patron_id, created_at) VALUES (?, ?)
+        ON CONFLICT (patron_id) DO NOTHING
+    ''', (patron_id, borrow_date))
+    conn.execute('''
+        INSERT INTO patron_ledger (patron_id, active_loans, total_loans, accrued_fees, last_activity)
+        VALUES (?, 1, 1, 0, ?)
+        ON CONFLICT (patron_id) DO UPDATE SET
+            active_loans = active_loans + 1,
+            total_loans = total_loans + 1,
+            last_activity = max(coalesce(last_activity, ''), excluded.last_activity)
+    ''', (patron_id, borrow_date))
+
+def _ledger_record_return(conn: sqlite3.Connection, patron_id: str, due_date: str, return_date: str):
+    """Close a loan in the patron's ledger row and accrue its late fee."""
+    fee = late_fee_for_days(days_overdue_between(datetime.fromisoformat(due_date),
+                                                 datetime.fromisoformat(return_date)))
+    conn.execute('''
+        UPDATE patron_ledger SET
+            active_loans = active_loans - 1,
+            accrued_fees = round(accrued_fees + ?, 2),
+            last_activity = max(coalesce(last_activity, ''), ?)
+        WHERE patron_id = ?
+    ''', (fee, return_date, patron_id))
+
+def _compute_patron_ledger(conn: sqlite3.Connection) -> Iterator[Dict]:
+    """Recompute every patron's ledger row from borrow_records, one patron at a time."""
+    cursor = conn.execute('''
+        SELECT patron_id, borrow_date, due_date, return_date FROM borrow_records
+        ORDER BY patron_id
     ''')
-    
-    conn.commit()
-    conn.close()
+    current = None
+    for patron_id, borrow_date, due_date, return_date in cursor:
+        if current is None or patron_id != current['patron_id']:
+            if current is not None:
+                yield current
+            current = {'patron_id': patron_id, 'created_at': borrow_date, 'active_loans': 0,
+                       'total_loans': 0, 'accrued_fees': 0.0, 'last_activity': borrow_date}
+        current['total_loans'] += 1
+        current['created_at'] = min(current['created_at'], borrow_date)
+        current['last_activity'] = max(current['last_activity'], borrow_date, return_date or '')
+        if return_date is None:
+            current['active_loans'] += 1
+        else:
+            fee = late_fee_for_days(days_overdue_between(datetime.fromisoformat(due_date),
+                                                         datetime.fromisoformat(return_date)))
+            current['accrued_fees'] = round(current['accrued_fees'] + fee, 2)
+    if current is not None:
+        yield current
+
+def _rebuild_patron_ledger(conn: sqlite3.Connection) -> int:
+    conn.execute('DELETE FROM patron_ledger')
+    patrons = 0
+    for row in _compute_patron_ledger(conn):
+        conn.execute('''
+            INSERT INTO patrons (patron_id, created_at) VALUES (?, ?)
+            ON CONFLICT (patron_id) DO NOTHING
+        ''', (row['patron_id'], row['created_at']))
+        conn.execute('''
+            INSERT INTO patron_ledger (patron_id, active_loans, total_loans, accrued_fees, last_activity)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (row['patron_id'], *(row[field] for field in LEDGER_FIELDS)))
+        patrons += 1
+    return patrons
+
+def ensure_patron_ledger(conn: sqlite3.Connection):
+    """Create the patrons and patron_ledger tables, filling the ledger from history if it is new."""
+    ledger_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patron_ledger'"
+    ).fetchone()
+    for ddl in PATRON_LEDGER_DDL:
+        conn.execute(ddl)
+    if not ledger_exists:
+        _rebuild_patron_ledger(conn)
+
+def rebuild_patron_ledger() -> int:
+    """
+    Recompute patron_ledger from borrow_records in one write transaction.
+
+    Returns:
+        int: Number of patrons with a ledger row afterwards
+    """
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            patrons = _rebuild_patron_ledger(conn)
+            conn.commit()
+            return patrons
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+def verify_patron_ledger() -> List[Dict]:
+    """
+    Compare patron_ledger against totals recomputed from borrow_records.
+
+    Returns:
+        list: One {'patron_id', 'field', 'expected', 'actual'} dict per
+        mismatch; empty when the ledger is consistent
+    """
+    mismatches = []
+    with db_connection() as conn:
+        stored = {row['patron_id']: row for row in conn.execute('SELECT * FROM patron_ledger')}
+        for expected in _compute_patron_ledger(conn):
+            actual = stored.pop(expected['patron_id'], None)
+            for field in LEDGER_FIELDS:
+                value = actual[field] if actual is not None else None
+                if value != expected[field]:
+                    mismatches.append({'patron_id': expected['patron_id'], 'field': field,
+                                       'expected': expected[field], 'actual': value})
+    for patron_id, actual in stored.items():
+        # Ledger rows for patrons with no loans must be all zero
+        for field, expected in zip(LEDGER_FIELDS, (0, 0, 0.0, None)):
+            if actual[field] != expected:
+                mismatches.append({'patron_id': patron_id, 'field': field,
+                                   'expected': expected, 'actual': actual[field]})
+    return mismatches
+
+# borrow_records dates are stored twice: ISO text, which existing callers and
+# exports read, and integer to_epoch_us() microseconds, which readers prefer
+# because they need no parsing and compare as plain integers. Rows written
+# before the epoch columns existed hold NULL there until
+# backfill_epoch_columns() reaches them, so readers coalesce to the text.
+EPOCH_COLUMNS = {'borrow_us': 'borrow_date', 'due_us': 'due_date', 'return_us': 'return_date'}
+
+def ensure_epoch_columns(conn: sqlite3.Connection):
+    """Add any missing epoch columns to borrow_records; a metadata-only change."""
+    existing = {row['name'] for row in conn.execute('PRAGMA table_info(borrow_records)')}
+    for column in EPOCH_COLUMNS:
+        if column not in existing:
+            conn.execute(f'ALTER TABLE borrow_records ADD COLUMN {column} INTEGER')
+
+def _epoch_or_none(value: Optional[str]) -> Optional[int]:
+    return to_epoch_us(datetime.fromisoformat(value)) if value is not None else None
+
+def backfill_epoch_columns(batch_size: int = 1000, pause: float = 0.0,
+                           progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Fill the epoch columns of rows written before they existed.
+
+    Walks borrow_records by id in batches. Each batch is read without a lock
+    and written in its own short BEGIN IMMEDIATE transaction, so borrows and
+    returns keep committing between batches. A return_us written by a return
+    that lands between a batch's read and its write is kept.
+
+    Args:
+        batch_size: Rows converted per write transaction
+        pause: Seconds to sleep between batches to leave room for other writers
+        progress: Called with the running total of converted rows after each batch
+
+    Returns:
+        int: Number of rows converted
+    """
+    converted = 0
+    last_id = 0
+    while True:
+        with db_connection() as conn:
+            rows = conn.execute('''
+                SELECT id, borrow_date, due_date, return_date FROM borrow_records
+                WHERE id > ? AND (borrow_us IS NULL OR due_us IS NULL
+                                  OR (return_date IS NOT NULL AND return_us IS NULL))
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                return converted
+            updates = [(to_epoch_us(datetime.fromisoformat(row['borrow_date'])),
+                        to_epoch_us(datetime.fromisoformat(row['due_date'])),
+                        _epoch_or_none(row['return_date']), row['id'])
+                       for row in rows]
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                cursor = conn.executemany('''
+                    UPDATE borrow_records
+                    SET borrow_us = ?, due_us = ?, return_us = coalesce(return_us, ?)
+                    WHERE id = ?
+                ''', updates)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        converted += cursor.rowcount
+        last_id = rows[-1]['id']
+        if progress is not None:
+            progress(converted)
+        if pause:
+            time.sleep(pause)
+
+def count_epoch_backfill_pending() -> int:
+    """Count borrow_records rows whose epoch columns still need backfilling."""
+    with db_connection() as conn:
+        return conn.execute('''
+            SELECT COUNT(*) FROM borrow_records
+            WHERE borrow_us IS NULL OR due_us IS NULL OR (return_date IS NOT NULL AND return_us IS NULL)
+        ''').fetchone()[0]
+
+# Indexes over the epoch columns, created by migration 6 once the epoch
+# backfill is complete, replacing the borrow_date indexes in INDEXES. Until
+# they exist some rows may still have NULL epoch columns, so predicates and
+# ORDER BYs stay on the ISO text; _epoch_indexes_ready() tells them apart.
+EPOCH_INDEXES = {
+    'idx_borrow_records_patron_book_borrow_us': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_book_borrow_us
+        ON borrow_records (patron_id, book_id, borrow_us)
+    ''',
+    'idx_borrow_records_patron_borrow_us': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_borrow_us
+        ON borrow_records (patron_id, borrow_us)
+    ''',
+    # id before due_us keeps the overdue sweep's (patron_id, book_id, id)
+    # keyset order, and due_us rides along so its filter needs no table read
+    'idx_borrow_records_active_due': '''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active_due
+        ON borrow_records (patron_id, book_id, id, due_us)
+        WHERE return_date IS NULL
+    ''',
+}
+
+_epoch_indexed: Dict[str, bool] = {}
+
+def ensure_epoch_indexes(conn: sqlite3.Connection):
+    """Create any missing indexes from EPOCH_INDEXES on an open connection."""
+    for ddl in EPOCH_INDEXES.values():
+        conn.execute(ddl)
+
+def _epoch_indexes_ready(conn: sqlite3.Connection) -> bool:
+    """True once EPOCH_INDEXES exist, so queries can filter and order on the epoch columns."""
+    if not _epoch_indexed.get(DATABASE):
+        _epoch_indexed[DATABASE] = all(
+            conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone()
+            for name in EPOCH_INDEXES)
+    return _epoch_indexed[DATABASE]
+
+def init_database():
+    """
+    Bring the database schema up to date by applying pending migrations.
+
+    Backfills that still have rows to convert are left for library-migrate,
+    so starting the app never waits on a long data migration.
+    """
+    from migrations import apply_migrations
+    apply_migrations(backfill=False)
 
 def add_sample_data():
     """Add sample data to the database if it's empty."""
-    conn = get_db_connection()
-    book_count = conn.execute('SELECT COUNT(*) as count FROM books').fetchone()['count']
-    
-    if book_count == 0:
-        # Add sample books
-        sample_books = [
-            ('The Great Gatsby', 'F. Scott Fitzgerald', '9780743273565', 3),
-            ('To Kill a Mockingbird', 'Harper Lee', '9780061120084', 2),
-            ('1984', 'George Orwell', '9780451524935', 1)
-        ]
+    with db_connection() as conn:
+        book_count = conn.execute('SELECT COUNT(*) as count FROM books').fetchone()['count']
         
-        for title, author, isbn, copies in sample_books:
+        if book_count == 0:
+            # Add sample books
+            sample_books = [
+                ('The Great Gatsby', 'F. Scott Fitzgerald', '9780743273565', 3),
+                ('To Kill a Mockingbird', 'Harper Lee', '9780061120084', 2),
+                ('1984', 'George Orwell', '9780451524935', 1)
+            ]
+            
+            for title, author, isbn, copies in sample_books:
+                conn.execute('''
+                    INSERT INTO books (title, author, isbn, total_copies, available_copies)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (title, author, isbn, copies, copies))
+            
+            # Make 1984 unavailable by adding a borrow record
+            borrow_date = datetime.now() - timedelta(days=5)
+            due_date = datetime.now() + timedelta(days=9)
             conn.execute('''
-                INSERT INTO books (title, author, isbn, total_copies, available_copies)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (title, author, isbn, copies, copies))
-        
-        # Make 1984 unavailable by adding a borrow record
-        conn.execute('''
-            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
-            VALUES (?, ?, ?, ?)
-        ''', ('123456', 3, 
-              (datetime.now() - timedelta(days=5)).isoformat(),
-              (datetime.now() + timedelta(days=9)).isoformat()))
-        
-        # Update available copies for 1984
-        conn.execute('UPDATE books SET available_copies = 0 WHERE id = 3')
-        
-        conn.commit()
-    
-    conn.close()
+                INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, borrow_us, due_us)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', ('123456', 3, borrow_date.isoformat(), due_date.isoformat(),
+                  to_epoch_us(borrow_date), to_epoch_us(due_date)))
+            _ledger_record_borrow(conn, '123456', borrow_date.isoformat())
+            
+            # Update available copies for 1984
+            conn.execute('UPDATE books SET available_copies = 0 WHERE id = 3')
+            
+            conn.commit()
+
+# Change listeners
+
+_book_insert_listeners: List[Callable[[Book], None]] = []
+
+def add_book_insert_listener(listener: Callable[[Book], None]):
+    """Register a callback invoked with the new Book after insert_book succeeds."""
+    if listener not in _book_insert_listeners:
+        _book_insert_listeners.append(listener)
+
+def remove_book_insert_listener(listener: Callable[[Book], None]):
+    """Unregister a callback added with add_book_insert_listener."""
+    if listener in _book_insert_listeners:
+        _book_insert_listeners.remove(listener)
 
 # Helper Functions for Database Operations
 
-def get_all_books() -> List[Dict]:
+def _select_tuples(conn: sqlite3.Connection, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+    """Run a query whose rows come back as plain tuples instead of sqlite3.Row."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute(sql, params)
+
+def get_all_books() -> List[Book]:
     """Get all books from the database."""
-    conn = get_db_connection()
-    books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
-    conn.close()
-    return [dict(book) for book in books]
+    with db_connection() as conn:
+        return [Book(*row) for row in _select_tuples(
+            conn, f'SELECT {Book.COLUMNS} FROM books ORDER BY title COLLATE NOCASE')]
+
+def get_catalog_books(limit: int, after: Optional[Tuple[str, int]] = None,
+                      before: Optional[Tuple[str, int]] = None) -> List[Book]:
+    """
+    Get up to limit books in catalog order (title case-insensitively, then id).
+
+    after is the (title, id) of the last book of the previous page; the page
+    starts strictly after it. With before instead, the books just before that
+    key are returned in reverse catalog order, for paging backwards. Either
+    way the scan is a range search on idx_books_title_nocase. The page is read
+    in full before returning so the pooled connection is not held while a
+    streamed response renders it.
+    """
+    if before is not None:
+        where, order, params = ('WHERE title <= ? COLLATE NOCASE AND (title COLLATE NOCASE, id) < (?, ?)',
+                                'DESC', (before[0], *before))
+    elif after is not None:
+        where, order, params = ('WHERE title >= ? COLLATE NOCASE AND (title COLLATE NOCASE, id) > (?, ?)',
+                                'ASC', (after[0], *after))
+    else:
+        where, order, params = '', 'ASC', ()
+    with db_connection() as conn:
+        rows = _select_tuples(conn, f'''
+            SELECT {Book.COLUMNS} FROM books {where}
+            ORDER BY title COLLATE NOCASE {order}, id {order}
+            LIMIT ?
+        ''', (*params, limit)).fetchall()
+    return [Book(*row) for row in rows]
 
-def get_book_by_id(book_id: int) -> Optional[Dict]:
+def get_catalog_version() -> int:
+    """Get the catalog version, which increases on every change to the books table."""
+    with db_connection() as conn:
+        row = conn.execute('SELECT version FROM catalog_meta WHERE id = 1').fetchone()
+    return row['version'] if row else 0
+
+def get_catalog_meta() -> Dict:
+    """
+    Get the catalog version and the UTC time of the last change to the books
+    table, as {'version': int, 'updated_at': datetime or None}. Both are kept
+    by triggers, so writes from other processes move them too.
+    """
+    with db_connection() as conn:
+        row = conn.execute('SELECT version, updated_at FROM catalog_meta WHERE id = 1').fetchone()
+    if row is None:
+        return {'version': 0, 'updated_at': None}
+    return {'version': row['version'],
+            'updated_at': datetime.fromisoformat(row['updated_at']).replace(tzinfo=timezone.utc)}
+
+def get_book_by_id(book_id: int) -> Optional[Book]:
     """Get a specific book by ID."""
-    conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
-    conn.close()
-    return dict(book) if book else None
+    with db_connection() as conn:
+        book = _select_tuples(conn, f'SELECT {Book.COLUMNS} FROM books WHERE id = ?', (book_id,)).fetchone()
+    return Book(*book) if book else None
 
-def get_book_by_isbn(isbn: str) -> Optional[Dict]:
+def get_book_by_isbn(isbn: str) -> Optional[Book]:
     """Get a specific book by ISBN."""
-    conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
-    conn.close()
-    return dict(book) if book else None
-
-def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
-    """Get currently borrowed books for a patron."""
-    conn = get_db_connection()
-    records = conn.execute('''
-        SELECT br.*, b.title, b.author 
-        FROM borrow_records br 
-        JOIN books b ON br.book_id = b.id 
-        WHERE br.patron_id = ? AND br.return_date IS NULL
-        ORDER BY br.borrow_date
-    ''', (patron_id,)).fetchall()
-    conn.close()
-    
-    borrowed_books = []
-    for record in records:
-        borrowed_books.append({
-            'book_id': record['book_id'],
-            'title': record['title'],
-            'author': record['author'],
-            'borrow_date': datetime.fromisoformat(record['borrow_date']),
-            'due_date': datetime.fromisoformat(record['due_date']),
-            'is_overdue': datetime.now() > datetime.fromisoformat(record['due_date'])
-        })
-    
-    return borrowed_books
+    with db_connection() as conn:
+        book = _select_tuples(conn, f'SELECT {Book.COLUMNS} FROM books WHERE isbn = ?', (isbn,)).fetchone()
+    return Book(*book) if book else None
+
+def iter_books_by_ids(book_ids: Iterable[int]) -> Iterator[Book]:
+    """Yield the books with the given IDs, in no particular order."""
+    book_ids = list(book_ids)
+    with db_connection() as conn:
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(book_ids), 500):
+            chunk = book_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in _select_tuples(conn, f'SELECT {Book.COLUMNS} FROM books WHERE id IN ({placeholders})',
+                                      chunk):
+                yield Book(*row)
+
+def get_books_by_ids(book_ids: Iterable[int]) -> List[Book]:
+    """Get the books with the given IDs, ordered by title."""
+    books = list(iter_books_by_ids(book_ids))
+    books.sort(key=lambda book: book['title'].lower())
+    return books
+
+def iter_books_by_text(term: str, field: str) -> Iterator[Book]:
+    """
+    Yield books whose title or author contains term, case-insensitively.
+
+    Rows are streamed off the cursor in no particular order so callers can
+    rank or cut off without materializing every match. Uses the books_fts
+    index when it is available and the term is long enough, otherwise
+    filters in SQL.
+    """
+    if field not in ('title', 'author'):
+        return
+    with db_connection() as conn:
+        if _fts_enabled.get(DATABASE) is None:
+            ensure_search_index(conn)
+            conn.commit()
+        if _fts_enabled[DATABASE] and len(term) >= FTS_MIN_TERM_LENGTH:
+            phrase = '"' + term.replace('"', '""') + '"'
+            cursor = _select_tuples(conn, '''
+                SELECT b.id, b.title, b.author, b.isbn, b.total_copies, b.available_copies
+                FROM books_fts f
+                JOIN books b ON b.id = f.rowid
+                WHERE books_fts MATCH ?
+            ''', (f'{field} : {phrase}',))
+        else:
+            cursor = _select_tuples(conn, f'''
+                SELECT {Book.COLUMNS} FROM books
+                WHERE instr(lower({field}), ?) > 0
+            ''', (term.lower(),))
+        for row in cursor:
+            yield Book(*row)
+
+def get_patron_borrowed_books(patron_id: str) -> List[BorrowRecord]:
+    """Get currently borrowed books for a patron, with their titles and authors."""
+    with db_connection() as conn:
+        return [BorrowRecord(*row, lazy=LAZY_DATES) for row in _select_tuples(conn, '''
+            SELECT br.id, br.patron_id, br.book_id, coalesce(br.borrow_us, br.borrow_date),
+                   coalesce(br.due_us, br.due_date), coalesce(br.return_us, br.return_date),
+                   b.title, b.author
+            FROM borrow_records br INDEXED BY idx_borrow_records_active
+            JOIN books b ON br.book_id = b.id 
+            WHERE br.patron_id = ? AND br.return_date IS NULL
+            ORDER BY br.borrow_date
+        ''', (patron_id,))]
+
+def iter_patron_loans(patron_id: str) -> Iterator[sqlite3.Row]:
+    """
+    Yield (book_id, borrow_date, due_date, return_date, title, author, due_us,
+    return_us) rows for every loan a patron has made, newest first. The epoch
+    columns are NULL on rows the epoch backfill has not reached.
+    """
+    with db_connection() as conn:
+        order = 'br.borrow_us' if _epoch_indexes_ready(conn) else 'br.borrow_date'
+        cursor = conn.execute(f'''
+            SELECT br.book_id, br.borrow_date, br.due_date, br.return_date, b.title, b.author,
+                   br.due_us, br.return_us
+            FROM borrow_records br
+            JOIN books b ON br.book_id = b.id
+            WHERE br.patron_id = ?
+            ORDER BY {order} DESC, br.id DESC
+        ''', (patron_id,))
+        yield from cursor
+
+def get_patron_loans_page(patron_id: str, limit: int,
+                          before: Optional[Tuple[Union[str, int], int]] = None) -> List[sqlite3.Row]:
+    """
+    Get up to limit of a patron's loans, newest first, as (id, book_id,
+    borrow_date, due_date, return_date, title, author, due_us, return_us,
+    page_key) rows.
+
+    Pages are ordered on (borrow_us, id) once the epoch indexes exist and on
+    (borrow_date, id) before that; page_key is the row's value of the first
+    column. before is the (page_key, id) of the last row of the previous
+    page, and the page starts strictly after it, so pages stay stable while
+    loans are added. An ISO text page_key keeps paging on borrow_date.
+    """
+    with db_connection() as conn:
+        if before is not None:
+            column = 'br.borrow_date' if isinstance(before[0], str) else 'br.borrow_us'
+        else:
+            column = 'br.borrow_us' if _epoch_indexes_ready(conn) else 'br.borrow_date'
+        after_clause = f'AND ({column}, br.id) < (?, ?)' if before else ''
+        return conn.execute(f'''
+            SELECT br.id, br.book_id, br.borrow_date, br.due_date, br.return_date, b.title, b.author,
+                   br.due_us, br.return_us, {column} AS page_key
+            FROM borrow_records br
+            JOIN books b ON br.book_id = b.id
+            WHERE br.patron_id = ? {after_clause}
+            ORDER BY {column} DESC, br.id DESC
+            LIMIT ?
+        ''', (patron_id, *(before or ()), limit)).fetchall()
 
 def get_patron_borrow_count(patron_id: str) -> int:
     """Get the number of books currently borrowed by a patron."""
-    conn = get_db_connection()
-    count = conn.execute('''
-        SELECT COUNT(*) as count FROM borrow_records 
-        WHERE patron_id = ? AND return_date IS NULL
-    ''', (patron_id,)).fetchone()['count']
-    conn.close()
-    return count
-
-def get_borrow_record(patron_id: str, book_id: int) -> Optional[Dict]:
+    with db_connection() as conn:
+        row = conn.execute('SELECT active_loans FROM patron_ledger WHERE patron_id = ?',
+                           (patron_id,)).fetchone()
+    return row['active_loans'] if row else 0
+
+def get_patron_ledger(patron_id: str) -> Dict:
+    """Get a patron's ledger row, or zero totals for a patron with no loans."""
+    with db_connection() as conn:
+        row = conn.execute('SELECT * FROM patron_ledger WHERE patron_id = ?', (patron_id,)).fetchone()
+    if row is None:
+        return {'patron_id': patron_id, 'active_loans': 0, 'total_loans': 0,
+                'accrued_fees': 0.0, 'last_activity': None}
+    return dict(row)
+
+def get_borrow_record(patron_id: str, book_id: int) -> Optional[BorrowRecord]:
     """Get the most recent borrow record for a patron and book."""
-    conn = get_db_connection()
-    record = conn.execute('''
-        SELECT * FROM borrow_records
-        WHERE patron_id = ? AND book_id = ?
-        ORDER BY borrow_date DESC
-        LIMIT 1
-    ''', (patron_id, book_id)).fetchone()
-    conn.close()
-    if record:
-        return {
-            'id': record['id'],
-            'patron_id': record['patron_id'],
-            'book_id': record['book_id'],
-            'borrow_date': datetime.fromisoformat(record['borrow_date']),
-            'due_date': datetime.fromisoformat(record['due_date']),
-            'return_date': datetime.fromisoformat(record['return_date']) if record['return_date'] else None
-        }
-    return None
+    with db_connection() as conn:
+        order = 'borrow_us' if _epoch_indexes_ready(conn) else 'borrow_date'
+        record = _select_tuples(conn, f'''
+            SELECT {BorrowRecord.COLUMNS} FROM borrow_records
+            WHERE patron_id = ? AND book_id = ?
+            ORDER BY {order} DESC, id DESC
+            LIMIT 1
+        ''', (patron_id, book_id)).fetchone()
+    return BorrowRecord(*record, lazy=LAZY_DATES) if record else None
 
 def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
     """Insert a new book into the database."""
-    conn = get_db_connection()
-    try:
-        conn.execute('''
-            INSERT INTO books (title, author, isbn, total_copies, available_copies)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (title, author, isbn, total_copies, available_copies))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        conn.close()
-        return False
+    with db_connection() as conn:
+        try:
+            cursor = conn.execute('''
+                INSERT INTO books (title, author, isbn, total_copies, available_copies)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (title, author, isbn, total_copies, available_copies))
+            conn.commit()
+        except Exception as e:
+            return False
+    book = Book(cursor.lastrowid, title, author, isbn, total_copies, available_copies)
+    for listener in list(_book_insert_listeners):
+        listener(book)
+    return True
+
+def insert_books_bulk(books: List[Tuple[str, str, str, int, int]]) -> Set[str]:
+    """
+    Insert many (title, author, isbn, total_copies, available_copies) rows in
+    one write transaction, skipping any whose ISBN is already in the catalog.
+
+    The duplicate check and the executemany insert share the transaction, so
+    a concurrent add cannot slip the same ISBN in between them. Insert
+    listeners are called for every new book after the commit.
+
+    Returns:
+        set: ISBNs skipped because the catalog already had them
+    """
+    inserted: List[Book] = []
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            existing = set()
+            isbns = [book[2] for book in books]
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(isbns), 500):
+                chunk = isbns[start:start + 500]
+                existing.update(row[0] for row in _select_tuples(
+                    conn, f"SELECT isbn FROM books WHERE isbn IN ({', '.join('?' * len(chunk))})", chunk))
+            new_books = [book for book in books if book[2] not in existing]
+            conn.executemany('''
+                INSERT INTO books (title, author, isbn, total_copies, available_copies)
+                VALUES (?, ?, ?, ?, ?)
+            ''', new_books)
+            if _book_insert_listeners:
+                new_isbns = [book[2] for book in new_books]
+                for start in range(0, len(new_isbns), 500):
+                    chunk = new_isbns[start:start + 500]
+                    inserted.extend(Book(*row) for row in _select_tuples(
+                        conn, f"SELECT {Book.COLUMNS} FROM books WHERE isbn IN ({', '.join('?' * len(chunk))})",
+                        chunk))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    for book in inserted:
+        for listener in list(_book_insert_listeners):
+            listener(book)
+    return existing
 
 def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
     """Insert a new borrow record into the database."""
-    conn = get_db_connection()
-    try:
-        conn.execute('''
-            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
-            VALUES (?, ?, ?, ?)
-        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        conn.close()
-        return False
+    with db_connection() as conn:
+        try:
+            conn.execute('''
+                INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, borrow_us, due_us)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat(),
+                  to_epoch_us(borrow_date), to_epoch_us(due_date)))
+            _ledger_record_borrow(conn, patron_id, borrow_date.isoformat())
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            return False
 
 def update_book_availability(book_id: int, change: int) -> bool:
     """Update the available copies of a book by a given amount (+1 for return, -1 for borrow)."""
-    conn = get_db_connection()
-    try:
-        conn.execute('''
-            UPDATE books SET available_copies = available_copies + ? WHERE id = ?
-        ''', (change, book_id))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        conn.close()
-        return False
+    with db_connection() as conn:
+        try:
+            conn.execute('''
+                UPDATE books SET available_copies = available_copies + ? WHERE id = ?
+            ''', (change, book_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            return False
 
 def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
     """Update the return date for a borrow record."""
-    conn = get_db_connection()
-    try:
-        conn.execute('''
-            UPDATE borrow_records 
-            SET return_date = ? 
-            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
-        ''', (return_date.isoformat(), patron_id, book_id))
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        conn.close()
-        return False
+    with db_connection() as conn:
+        try:
+            closed = conn.execute('''
+                UPDATE borrow_records 
+                SET return_date = ?, return_us = ?
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+                RETURNING due_date
+            ''', (return_date.isoformat(), to_epoch_us(return_date), patron_id, book_id)).fetchall()
+            for record in closed:
+                _ledger_record_return(conn, patron_id, record['due_date'], return_date.isoformat())
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            return False
+
+def borrow_book_atomic(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime,
+                       max_borrowed: int = 5) -> Tuple[str, Optional[Dict]]:
+    """
+    Borrow a book in a single write transaction.
+
+    Checks availability and the patron's loan limit, inserts the borrow record
+    and decrements available_copies under one BEGIN IMMEDIATE, so concurrent
+    borrowers cannot drive available_copies below zero.
+
+    Returns:
+        tuple: (status, book) where status is one of 'ok', 'not_found',
+        'unavailable', 'limit_reached' or 'error'
+    """
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
+            if not book:
+                conn.rollback()
+                return 'not_found', None
+            if book['available_copies'] <= 0:
+                conn.rollback()
+                return 'unavailable', dict(book)
+            ledger = conn.execute('SELECT active_loans FROM patron_ledger WHERE patron_id = ?',
+                                  (patron_id,)).fetchone()
+            if ledger is not None and ledger['active_loans'] >= max_borrowed:
+                conn.rollback()
+                return 'limit_reached', dict(book)
+            updated = conn.execute('''
+                UPDATE books SET available_copies = available_copies - 1
+                WHERE id = ? AND available_copies > 0
+            ''', (book_id,))
+            if updated.rowcount == 0:
+                conn.rollback()
+                return 'unavailable', dict(book)
+            conn.execute('''
+                INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, borrow_us, due_us)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat(),
+                  to_epoch_us(borrow_date), to_epoch_us(due_date)))
+            _ledger_record_borrow(conn, patron_id, borrow_date.isoformat())
+            conn.commit()
+            return 'ok', dict(book)
+        except sqlite3.Error:
+            conn.rollback()
+            return 'error', None
+
+def return_book_atomic(patron_id: str, book_id: int, return_date: datetime) -> Tuple[str, Optional[Dict]]:
+    """
+    Return a book in a single write transaction.
+
+    Closes the patron's active borrow record and increments available_copies
+    (never above total_copies) under one BEGIN IMMEDIATE.
+
+    Returns:
+        tuple: (status, record) where status is one of 'ok', 'not_found',
+        'not_borrowed' or 'error'; record is the closed borrow record
+    """
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            book = conn.execute('SELECT id FROM books WHERE id = ?', (book_id,)).fetchone()
+            if not book:
+                conn.rollback()
+                return 'not_found', None
+            record = conn.execute('''
+                SELECT * FROM borrow_records
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+                ORDER BY borrow_date DESC
+                LIMIT 1
+            ''', (patron_id, book_id)).fetchone()
+            if not record:
+                conn.rollback()
+                return 'not_borrowed', None
+            conn.execute('UPDATE borrow_records SET return_date = ?, return_us = ? WHERE id = ?',
+                         (return_date.isoformat(), to_epoch_us(return_date), record['id']))
+            _ledger_record_return(conn, patron_id, record['due_date'], return_date.isoformat())
+            conn.execute('''
+                UPDATE books SET available_copies = available_copies + 1
+                WHERE id = ? AND available_copies < total_copies
+            ''', (book_id,))
+            conn.commit()
+            return 'ok', {
+                'id': record['id'],
+                'patron_id': record['patron_id'],
+                'book_id': record['book_id'],
+                'borrow_date': datetime.fromisoformat(record['borrow_date']),
+                'due_date': datetime.fromisoformat(record['due_date']),
+                'return_date': return_date
+            }
+        except sqlite3.Error:
+            conn.rollback()
+            return 'error', None
+
+def iter_overdue_loan_chunks(as_of: datetime, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """
+    Yield active loans due before as_of in chunks of at most chunk_size.
+
+    Loans come out ordered by (patron_id, book_id, id) using keyset pagination
+    on an active-loan index; once the epoch indexes exist the sweep pins
+    idx_borrow_records_active_due so the due_us test is answered from it. Each chunk is read with its own short query, so
+    no read transaction is held open across the whole sweep.
+    """
+    last = ('', -1, -1)
+    while True:
+        with db_connection() as conn:
+            if _epoch_indexes_ready(conn):
+                index, due_clause, cutoff = ('INDEXED BY idx_borrow_records_active_due', 'due_us < ?',
+                                             to_epoch_us(as_of))
+            else:
+                index, due_clause, cutoff = '', 'due_date < ?', as_of.isoformat()
+            rows = conn.execute(f'''
+                SELECT id, patron_id, book_id, borrow_date, due_date, due_us FROM borrow_records {index}
+                WHERE return_date IS NULL AND {due_clause}
+                  AND (patron_id, book_id, id) > (?, ?, ?)
+                ORDER BY patron_id, book_id, id
+                LIMIT ?
+            ''', (cutoff, *last, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield [dict(row) for row in rows]
+        last = (rows[-1]['patron_id'], rows[-1]['book_id'], rows[-1]['id'])
 
 def clear_test_data():
     """Clear test data from the database (for testing purposes only)."""
-    conn = get_db_connection()
-    try:
-        conn.execute('DELETE FROM borrow_records WHERE patron_id IN ("111111", "222222", "333333", "444444", "555555", "666666", "777777", "888888", "999999", "123456", "654321", "000000")')
-        conn.execute('''DELETE FROM books WHERE isbn LIKE "123456789000%" 
-                        OR isbn LIKE "111111111111%" OR isbn LIKE "222222222222%" 
-                        OR isbn LIKE "333333333333%" OR isbn LIKE "444444444444%" 
-                        OR isbn LIKE "555555555555%" OR isbn LIKE "666666666666%" 
-                        OR isbn LIKE "777777777777%" OR isbn LIKE "888888888888%" 
-                        OR isbn LIKE "999999999900%" OR isbn LIKE "97807432735%" 
-                        OR isbn LIKE "97807432736%" OR isbn LIKE "97807432737%"''')
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        conn.close()
-        return False
\ No newline at end of file
+    with db_connection() as conn:
+        try:
+            test_patrons = '("111111", "222222", "333333", "444444", "555555", "666666", "777777", "888888", "999999", "123456", "654321", "000000")'
+            conn.execute(f'DELETE FROM borrow_records WHERE patron_id IN {test_patrons}')
+            conn.execute(f'DELETE FROM patron_ledger WHERE patron_id IN {test_patrons}')
+            conn.execute(f'DELETE FROM patrons WHERE patron_id IN {test_patrons}')
+            conn.execute('''DELETE FROM books WHERE isbn LIKE "123456789000%" 
+                            OR isbn LIKE "111111111111%" OR isbn LIKE "222222222222%" 
+                            OR isbn LIKE "333333333333%" OR isbn LIKE "444444444444%" 
+                            OR isbn LIKE "555555555555%" OR isbn LIKE "666666666666%" 
+                            OR isbn LIKE "777777777777%" OR isbn LIKE "888888888888%" 
+                            OR isbn LIKE "999999999900%" OR isbn LIKE "97807432735%" 
+                            OR isbn LIKE "97807432736%" OR isbn LIKE "97807432737%"''')
+            conn.commit()
+            return True
+        except Exception as e:
+            return False
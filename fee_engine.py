@@ -0,0 +1,117 @@
+"""
+Fee Engine Module - R5 late fee rules for one loan or millions
+Scalar and batch late fee calculation sharing one set of rules
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives identical results
+    np = None
+
+# R5: $0.50/day for the first 7 days overdue, $1.00/day after that, capped at $15.00
+DAILY_FEE_FIRST_WEEK = 0.5
+DAILY_FEE_AFTER_WEEK = 1.0
+FIRST_WEEK_DAYS = 7
+MAX_FEE_PER_BOOK = 15.0
+
+MICROSECONDS_PER_DAY = 86_400_000_000
+NOT_RETURNED = -1  # Return timestamp of a loan that is still out
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_us(value: datetime) -> int:
+    """
+    Convert a naive datetime to integer microseconds since 1970-01-01.
+
+    The wall-clock value is used as-is, so differences between two converted
+    datetimes equal the timedelta between them, exactly as the scalar
+    calculation sees it.
+    """
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_epoch_us(value: int) -> datetime:
+    """Convert a to_epoch_us() value back to the naive datetime it came from."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def days_overdue_us(due_us: int, end_us: int) -> int:
+    """Whole days from due_us to end_us (to_epoch_us() values), or 0 if not late."""
+    return max((end_us - due_us) // MICROSECONDS_PER_DAY, 0)
+
+
+def late_fee_for_days(days_overdue: int) -> float:
+    """Late fee for a loan that is days_overdue whole days late."""
+    if days_overdue <= 0:
+        return 0.0
+    if days_overdue <= FIRST_WEEK_DAYS:
+        fee = days_overdue * DAILY_FEE_FIRST_WEEK
+    else:
+        fee = FIRST_WEEK_DAYS * DAILY_FEE_FIRST_WEEK + (days_overdue - FIRST_WEEK_DAYS) * DAILY_FEE_AFTER_WEEK
+    return round(min(fee, MAX_FEE_PER_BOOK), 2)
+
+
+def days_overdue_between(due_date: datetime, end_date: datetime) -> int:
+    """Whole days from due_date to end_date, or 0 if not late."""
+    return max((end_date - due_date).days, 0)
+
+
+def calculate_late_fees(due_us: Sequence[int], return_us: Sequence[int],
+                        now: Optional[datetime] = None,
+                        use_numpy: Optional[bool] = None) -> Tuple[Sequence[int], Sequence[float]]:
+    """
+    Calculate days overdue and late fees for many loans in one pass.
+
+    Args:
+        due_us: Due dates as to_epoch_us() values
+        return_us: Return dates as to_epoch_us() values; NOT_RETURNED (or
+            None) for loans still out, which are measured against now
+        now: Clock for unreturned loans (defaults to datetime.now())
+        use_numpy: Force the NumPy (True) or pure-Python (False) path;
+            by default NumPy is used when it is installed
+
+    Returns:
+        tuple: (days_overdue, fee_amount), NumPy arrays on the NumPy path and
+        lists otherwise, matching late_fee_for_days() element for element
+    """
+    now_us = to_epoch_us(now or datetime.now())
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("NumPy is not installed.")
+        return _calculate_late_fees_numpy(due_us, return_us, now_us)
+    return _calculate_late_fees_python(due_us, return_us, now_us)
+
+
+def _calculate_late_fees_python(due_us, return_us, now_us) -> Tuple[List[int], List[float]]:
+    days_list = []
+    fee_list = []
+    for due, returned in zip(due_us, return_us):
+        end = now_us if returned is None or returned == NOT_RETURNED else returned
+        days = max((end - due) // MICROSECONDS_PER_DAY, 0)
+        days_list.append(days)
+        fee_list.append(late_fee_for_days(days))
+    return days_list, fee_list
+
+
+def _calculate_late_fees_numpy(due_us, return_us, now_us):
+    due = np.asarray(due_us, dtype=np.int64)
+    if isinstance(return_us, np.ndarray):
+        returned = return_us.astype(np.int64, copy=False)
+    else:
+        returned = np.array([NOT_RETURNED if r is None else r for r in return_us], dtype=np.int64)
+    end = np.where(returned == NOT_RETURNED, np.int64(now_us), returned)
+    days = np.maximum((end - due) // MICROSECONDS_PER_DAY, 0)
+    fees = np.where(
+        days <= FIRST_WEEK_DAYS,
+        days * DAILY_FEE_FIRST_WEEK,
+        FIRST_WEEK_DAYS * DAILY_FEE_FIRST_WEEK + (days - FIRST_WEEK_DAYS) * DAILY_FEE_AFTER_WEEK,
+    )
+    fees = np.round(np.minimum(fees, MAX_FEE_PER_BOOK), 2)
+    return days, fees
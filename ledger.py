@@ -0,0 +1,49 @@
+"""
+Patron Ledger Maintenance - Rebuild or check the materialized patron ledger
+Recomputes active loans, accrued fees and last activity for every patron from
+borrow_records and either rewrites patron_ledger or reports any drift.
+
+Usage:
+    library-ledger verify [--database library.db]
+    library-ledger rebuild [--database library.db]
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+import database
+from database import rebuild_patron_ledger, verify_patron_ledger
+
+MAX_REPORTED_MISMATCHES = 20
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for library-ledger; exits 1 if verify finds drift."""
+    parser = argparse.ArgumentParser(prog='library-ledger',
+                                     description='Rebuild or verify the patron ledger.')
+    parser.add_argument('command', choices=('verify', 'rebuild'))
+    parser.add_argument('--database', default=database.DATABASE, help='SQLite database file')
+    args = parser.parse_args(argv)
+
+    database.DATABASE = args.database
+    database.init_database()
+    start = time.perf_counter()
+    if args.command == 'rebuild':
+        patrons = rebuild_patron_ledger()
+        print(f"Rebuilt ledger for {patrons} patrons in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return 0
+
+    mismatches = verify_patron_ledger()
+    for mismatch in mismatches[:MAX_REPORTED_MISMATCHES]:
+        print(f"{mismatch['patron_id']}: {mismatch['field']} is {mismatch['actual']!r}, "
+              f"expected {mismatch['expected']!r}")
+    if len(mismatches) > MAX_REPORTED_MISMATCHES:
+        print(f"... and {len(mismatches) - MAX_REPORTED_MISMATCHES} more")
+    print(f"Found {len(mismatches)} ledger mismatches in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,13 +3,68 @@ Library Service Module - Business Logic Functions
 Contains all the core business logic for the Library Management System
 """
 
+import base64
+import heapq
+import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import database
 from database import (
-    get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
-    insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books
+    get_book_by_isbn, insert_book, borrow_book_atomic, return_book_atomic,
+    iter_books_by_text, iter_books_by_ids, get_catalog_version,
+    iter_patron_loans, get_patron_loans_page, get_patron_ledger,
+    get_patron_borrowed_books, get_catalog_books
 )
+from cache import LRUCache
+from fee_engine import days_overdue_between, days_overdue_us, late_fee_for_days, to_epoch_us
+from search_index import get_ngram_index, get_fuzzy_index
+
+# Books per catalog page when the request does not say
+CATALOG_PAGE_SIZE = 50
+
+# Search result pages, keyed on (database, catalog version, normalized term,
+# search type, cursor, limit). Any change to the catalog bumps its version,
+# so pages from older versions are never matched again and age out.
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL = 300  # seconds
+_search_cache = LRUCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+
+# Patron status reports, keyed on (database, patron ID, ledger row). The
+# patron_ledger row changes inside every borrow or return transaction, from
+# any process, so a report cached under an older row is simply never matched
+# again. The TTL bounds how long a write that bypasses the ledger (raw SQL on
+# borrow_records, a book retitled) can go unnoticed. Entries hold only the
+# clock-independent part of a report; reports for patrons with more loans
+# than PATRON_REPORT_MAX_LOANS are not cached at all so one institutional
+# account cannot pin a huge history.
+PATRON_REPORT_CACHE_SIZE = 256
+PATRON_REPORT_CACHE_TTL = 60  # seconds
+PATRON_REPORT_MAX_LOANS = 2000
+_patron_report_cache = LRUCache(PATRON_REPORT_CACHE_SIZE, PATRON_REPORT_CACHE_TTL)
+
+def validate_book_fields(title: str, author: str, isbn: str, total_copies: int) -> Optional[str]:
+    """Check a book against the R1 field rules, returning the first error message or None."""
+    if not title or not title.strip():
+        return "Title is required."
+    
+    if len(title.strip()) > 200:
+        return "Title must be less than 200 characters."
+    
+    if not author or not author.strip():
+        return "Author is required."
+    
+    if len(author.strip()) > 100:
+        return "Author must be less than 100 characters."
+    
+    if len(isbn) != 13:
+        return "ISBN must be exactly 13 digits."
+    
+    if not isbn.isdigit():
+        return "ISBN must contain only digits."
+    
+    if not isinstance(total_copies, int) or total_copies <= 0:
+        return "Total copies must be a positive integer."
+    return None
 
 def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
     """
@@ -26,26 +81,9 @@ def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -
         tuple: (success: bool, message: str)
     """
     # Input validation
-    if not title or not title.strip():
-        return False, "Title is required."
-    
-    if len(title.strip()) > 200:
-        return False, "Title must be less than 200 characters."
-    
-    if not author or not author.strip():
-        return False, "Author is required."
-    
-    if len(author.strip()) > 100:
-        return False, "Author must be less than 100 characters."
-    
-    if len(isbn) != 13:
-        return False, "ISBN must be exactly 13 digits."
-    
-    if not isbn.isdigit():
-        return False, "ISBN must contain only digits."
-    
-    if not isinstance(total_copies, int) or total_copies <= 0:
-        return False, "Total copies must be a positive integer."
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return False, error
     
     # Check for duplicate ISBN
     existing = get_book_by_isbn(isbn)
@@ -75,33 +113,22 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if not patron_id or not isinstance(patron_id, str) or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
-    # Check if book exists and is available
-    book = get_book_by_id(book_id)
-    if not book:
-        return False, "Book not found."
-    
-    if book['available_copies'] <= 0:
-        return False, "This book is currently not available."
-    
-    # Check patron's current borrowed books count
-    current_borrowed = get_patron_borrow_count(patron_id)
-    
-    if current_borrowed >= 5:
-        return False, "You have reached the maximum borrowing limit of 5 books."
-    
     # Create borrow record
     borrow_date = datetime.now()
     due_date = borrow_date + timedelta(days=14)
     
-    # Insert borrow record and update availability
-    borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
-    if not borrow_success:
+    # Availability check, limit check, borrow record and availability update
+    # all happen in one transaction
+    status, book = borrow_book_atomic(patron_id, book_id, borrow_date, due_date)
+    if status == 'not_found':
+        return False, "Book not found."
+    if status == 'unavailable':
+        return False, "This book is currently not available."
+    if status == 'limit_reached':
+        return False, "You have reached the maximum borrowing limit of 5 books."
+    if status != 'ok':
         return False, "Database error occurred while creating borrow record."
     
-    availability_success = update_book_availability(book_id, -1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
-    
     return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
 
 def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
@@ -112,24 +139,15 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     # Validate patron ID
     if not patron_id or not isinstance(patron_id, str) or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
-    # Check if book exists
-    book = get_book_by_id(book_id)
-    if not book:
+    # Close the borrow record and increment availability in one transaction
+    now = datetime.now()
+    status, record = return_book_atomic(patron_id, book_id, now)
+    if status == 'not_found':
         return False, "Book not found."
-    # Check if the book was borrowed by the patron and not yet returned
-    from database import get_borrow_record
-    record = get_borrow_record(patron_id, book_id)
-    if not record or record['return_date'] is not None:
+    if status == 'not_borrowed':
         return False, "No active borrow record found for this patron and book."
-    # Update borrow record with return date
-    now = datetime.now()
-    updated = update_borrow_record_return_date(patron_id, book_id, now)
-    if not updated:
+    if status != 'ok':
         return False, "Database error occurred while updating return date."
-    # Increment book availability
-    avail_updated = update_book_availability(book_id, 1)
-    if not avail_updated:
-        return False, "Database error occurred while updating book availability."
     # Calculate late fee (optional, for message)
     due_date = record['due_date']
     days_late = (now - due_date).days
@@ -151,102 +169,393 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
             'days_overdue': 0,
             'status': 'No borrow record found.'
         }
-    due_date = record['due_date']
     return_date = record['return_date'] or datetime.now()
-    days_overdue = (return_date - due_date).days
+    days_overdue = days_overdue_between(record['due_date'], return_date)
     if days_overdue <= 0:
         return {
             'fee_amount': 0.00,
             'days_overdue': 0,
             'status': 'No late fee.'
         }
-    # Calculate fee
-    fee = 0.0
-    if days_overdue <= 7:
-        fee = days_overdue * 0.5
-    else:
-        fee = 7 * 0.5 + (days_overdue - 7) * 1.0
-    fee = min(fee, 15.0)
     return {
-        'fee_amount': round(fee, 2),
+        'fee_amount': late_fee_for_days(days_overdue),
         'days_overdue': days_overdue,
         'status': 'Late fee applied.'
     }
 
+def _relevance(value: str, term: str) -> int:
+    """Rank a match: 0 exact, 1 prefix, 2 substring."""
+    value = value.lower()
+    if value == term:
+        return 0
+    if value.startswith(term):
+        return 1
+    return 2
+
+def _iter_search_matches(term: str, search_type: str) -> Iterator[Tuple[Tuple, Dict]]:
+    """Yield (sort key, book) for every match; smaller keys are more relevant."""
+    if search_type in ('title', 'author'):
+        index = get_ngram_index()
+        if index is not None:
+            books = iter_books_by_ids(index.search(term, search_type))
+        else:
+            books = iter_books_by_text(term, search_type)
+        lowered = term.lower()
+        for book in books:
+            # Re-check against the live row in case the index is stale
+            if lowered in book[search_type].lower():
+                yield (_relevance(book[search_type], lowered), book['title'].lower(), book['id']), book
+    elif search_type == 'isbn':
+        # Exact match through the unique ISBN index
+        book = get_book_by_isbn(term)
+        if book:
+            yield (0, book['title'].lower(), book['id']), book
+    elif search_type == 'fuzzy':
+        # Typo-tolerant title/author match, closest first
+        ranked = dict(get_fuzzy_index().search(term))
+        for book in iter_books_by_ids(ranked):
+            book = dict(book, match_distance=ranked[book['id']])
+            yield (book['match_distance'], book['title'].lower(), book['id']), book
+
+def encode_search_cursor(key: Tuple) -> str:
+    """Encode the sort key of the last result on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_search_cursor(cursor: str) -> Tuple:
+    """Decode a cursor from encode_search_cursor. Raises ValueError if malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if (not isinstance(key, list) or len(key) != 3 or not isinstance(key[0], int)
+            or not isinstance(key[1], str) or not isinstance(key[2], int)):
+        raise ValueError("Invalid cursor.")
+    return tuple(key)
+
 def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     """
     Search for books in the catalog.
     Implements R6: Book Search Functionality
+    
+    Results are ordered by relevance: exact match, then prefix match, then
+    substring match, each by title. Fuzzy results are ordered by edit distance.
     """
-    from database import get_all_books
-    books = get_all_books()
-    term = search_term.strip().lower()
-    results = []
+    term = search_term.strip()
     
     # Return empty results for empty search terms
     if not term:
-        return results
+        return []
     
-    if search_type == 'title':
-        results = [b for b in books if term in b['title'].lower()]
-    elif search_type == 'author':
-        results = [b for b in books if term in b['author'].lower()]
-    elif search_type == 'isbn':
-        results = [b for b in books if b['isbn'] == search_term.strip()]
-    else:
-        results = []
-    return results
+    matches = sorted(_iter_search_matches(term, search_type), key=lambda match: match[0])
+    return [book for _, book in matches]
 
-def get_patron_status_report(patron_id: str) -> Dict:
+def search_books_page(search_term: str, search_type: str, limit: int = 20,
+                      cursor: Optional[str] = None) -> Dict:
     """
-    Get status report for a patron.
-    Implements R7: Patron Status Report
+    Get one page of ranked search results.
+    
+    Keeps only the best limit + 1 matches after the cursor in a heap, so the
+    full match set is never sorted or held in memory.
+    
+    Args:
+        search_term: Text to search for
+        search_type: 'title', 'author', 'isbn' or 'fuzzy'
+        limit: Maximum number of results on the page
+        cursor: next_cursor from the previous page, if any
+        
+    Returns:
+        dict: {'results': [...], 'next_cursor': str or None}. Pages are
+        cached until the catalog changes; treat them as read-only.
+        
+    Raises:
+        ValueError: If cursor is malformed
+    """
+    after = decode_search_cursor(cursor) if cursor else None
+    term = search_term.strip()
+    if not term or limit <= 0:
+        return {'results': [], 'next_cursor': None}
+    
+    # Read the version before the matches: a write in between then leaves
+    # the page under a version that is already out of date
+    key = (database.DATABASE, get_catalog_version(), term.lower(), search_type, cursor, limit)
+    page = _search_cache.get(key)
+    if page is not None:
+        return page
+    
+    matches = _iter_search_matches(term, search_type)
+    if after is not None:
+        matches = (match for match in matches if match[0] > after)
+    top = heapq.nsmallest(limit + 1, matches, key=lambda match: match[0])
+    
+    next_cursor = encode_search_cursor(top[limit - 1][0]) if len(top) > limit else None
+    page = {'results': [book for _, book in top[:limit]], 'next_cursor': next_cursor}
+    _search_cache.put(key, page)
+    return page
+
+def get_search_cache_stats() -> Dict:
+    """Get hit/miss/eviction counters for the search result cache."""
+    return _search_cache.stats()
+
+def _loan_days_overdue(due_text: str, return_text: Optional[str], due_us: Optional[int],
+                       return_us: Optional[int], now_us: Optional[int]) -> int:
+    """
+    Days a loan is (or was) overdue from its stored dates, preferring the
+    epoch columns and parsing the ISO text only where they are not yet
+    backfilled. now_us is only needed for open loans.
+    """
+    if return_text is not None and return_text <= due_text:
+        # ISO timestamps sort as text, so on-time returns need no arithmetic
+        return 0
+    if due_us is None:
+        due_us = to_epoch_us(datetime.fromisoformat(due_text))
+    if return_text is None:
+        return days_overdue_us(due_us, now_us)
+    if return_us is None:
+        return_us = to_epoch_us(datetime.fromisoformat(return_text))
+    return days_overdue_us(due_us, return_us)
+
+def _history_entry(book_id: int, borrow_text: str, due_text: str, return_text: Optional[str],
+                   title: str, author: str, days_overdue: int) -> Dict:
+    """Build one borrowing history entry as returned by the R7 report."""
+    return {
+        'book_id': book_id,
+        'title': title,
+        'author': author,
+        'borrow_date': borrow_text,
+        'due_date': due_text,
+        'return_date': return_text,
+        'late_fee': late_fee_for_days(days_overdue),
+        'days_overdue': days_overdue
+    }
+
+def _build_patron_report_parts(patron_id: str) -> Tuple[List[Dict], List[Tuple], float]:
+    """
+    Read the clock-independent parts of a patron's R7 report in one pass.
+
+    Returns:
+        tuple: (history, open_loans, returned_fees) where open_loans holds
+        (history index, book_id, title, author, borrow_date, due_date, due_us)
+        for each loan still out, newest first; their history entries carry
+        no fee until the report is finished against a clock
     """
-    from database import get_patron_borrowed_books, get_patron_borrow_count, get_db_connection
-    # Currently borrowed books
-    borrowed_books = get_patron_borrowed_books(patron_id)
-    # Number of books currently borrowed
-    num_borrowed = get_patron_borrow_count(patron_id)
-    # Borrowing history (all books ever borrowed)
-    conn = get_db_connection()
-    history_records = conn.execute('''
-        SELECT br.*, b.title, b.author FROM borrow_records br
-        JOIN books b ON br.book_id = b.id
-        WHERE br.patron_id = ?
-        ORDER BY br.borrow_date DESC
-    ''', (patron_id,)).fetchall()
-    conn.close()
     history = []
-    total_late_fees = 0.0
-    for record in history_records:
-        due_date = datetime.fromisoformat(record['due_date'])
-        return_date = datetime.fromisoformat(record['return_date']) if record['return_date'] else None
-        days_overdue = 0
-        fee = 0.0
-        if return_date and return_date > due_date:
-            days_overdue = (return_date - due_date).days
-        elif not return_date and datetime.now() > due_date:
-            days_overdue = (datetime.now() - due_date).days
-        if days_overdue > 0:
-            if days_overdue <= 7:
-                fee = days_overdue * 0.5
-            else:
-                fee = 7 * 0.5 + (days_overdue - 7) * 1.0
-            fee = min(fee, 15.0)
+    open_loans = []
+    returned_fees = 0.0
+    for book_id, borrow_text, due_text, return_text, title, author, due_us, return_us in iter_patron_loans(patron_id):
+        if return_text is None:
+            due_date = datetime.fromisoformat(due_text)
+            open_loans.append((len(history), book_id, title, author, datetime.fromisoformat(borrow_text),
+                               due_date, due_us if due_us is not None else to_epoch_us(due_date)))
+            history.append(_history_entry(book_id, borrow_text, due_text, None, title, author, 0))
+            continue
+        entry = _history_entry(book_id, borrow_text, due_text, return_text, title, author,
+                               _loan_days_overdue(due_text, return_text, due_us, return_us, None))
+        returned_fees += entry['late_fee']
+        history.append(entry)
+    return history, open_loans, returned_fees
+
+def _finish_patron_report(parts: Tuple[List[Dict], List[Tuple], float], now: datetime) -> Dict:
+    """Price the open loans in parts against now and assemble the R7 report."""
+    history, open_loans, total_late_fees = parts
+    history = list(history)
+    currently_borrowed = []
+    now_us = to_epoch_us(now)
+    for index, book_id, title, author, borrow_date, due_date, due_us in open_loans:
+        days_overdue = days_overdue_us(due_us, now_us)
+        fee = late_fee_for_days(days_overdue)
         total_late_fees += fee
-        history.append({
-            'book_id': record['book_id'],
-            'title': record['title'],
-            'author': record['author'],
-            'borrow_date': record['borrow_date'],
-            'due_date': record['due_date'],
-            'return_date': record['return_date'],
-            'late_fee': round(fee, 2),
-            'days_overdue': days_overdue
+        history[index] = dict(history[index], late_fee=fee, days_overdue=days_overdue)
+        currently_borrowed.append({
+            'book_id': book_id,
+            'title': title,
+            'author': author,
+            'borrow_date': borrow_date,
+            'due_date': due_date,
+            'is_overdue': now > due_date
         })
+    
+    # Current loans are listed oldest first
+    currently_borrowed.reverse()
     return {
-        'currently_borrowed': borrowed_books,
-        'num_borrowed': num_borrowed,
+        'currently_borrowed': currently_borrowed,
+        'num_borrowed': len(currently_borrowed),
         'total_late_fees': round(total_late_fees, 2),
         'borrowing_history': history
     }
+
+def get_patron_status_report(patron_id: str) -> Dict:
+    """
+    Get status report for a patron.
+    Implements R7: Patron Status Report
+    
+    Built from a single query over the patron's borrow records: current
+    loans, the loan count, history and fees all come from the same pass.
+    The returned-loan part of the report is cached per patron until their
+    patron_ledger row changes; fees on open loans are recomputed on every call.
+    Entries for returned loans are shared with the cache and must not be
+    modified. For patrons with long histories use
+    get_patron_history_summary() and get_patron_history_page() instead.
+    """
+    # Read the ledger before the loans: a loan that changes in between then
+    # leaves the entry under a ledger row that is already out of date.
+    ledger = get_patron_ledger(patron_id)
+    key = (database.DATABASE, patron_id, tuple(ledger[field] for field in database.LEDGER_FIELDS))
+    parts = _patron_report_cache.get(key)
+    if parts is None:
+        parts = _build_patron_report_parts(patron_id)
+        if len(parts[0]) <= PATRON_REPORT_MAX_LOANS:
+            _patron_report_cache.put(key, parts)
+    return _finish_patron_report(parts, datetime.now())
+
+def get_patron_report_cache_stats() -> Dict:
+    """Get hit/miss counters for the patron status report cache."""
+    return _patron_report_cache.stats()
+
+def get_patron_history_summary(patron_id: str) -> Dict:
+    """
+    Get the R7 report totals for a patron without reading the history.
+
+    Counts and fees for returned loans come from the patron's ledger row;
+    only the open loans (at most the R3 limit) are read to add the fees
+    still accruing on them.
+
+    Returns:
+        dict: num_borrowed, num_overdue, total_loans, total_late_fees and
+        last_activity
+    """
+    ledger = get_patron_ledger(patron_id)
+    now = datetime.now()
+    num_overdue = 0
+    total_late_fees = ledger['accrued_fees']
+    if ledger['active_loans']:
+        for loan in get_patron_borrowed_books(patron_id):
+            num_overdue += loan['is_overdue']
+            total_late_fees += late_fee_for_days(days_overdue_between(loan['due_date'], now))
+    return {
+        'num_borrowed': ledger['active_loans'],
+        'num_overdue': num_overdue,
+        'total_loans': ledger['total_loans'],
+        'total_late_fees': round(total_late_fees, 2),
+        'last_activity': ledger['last_activity']
+    }
+
+def encode_catalog_cursor(title: str, book_id: int) -> str:
+    """Encode the (title, id) of a book on a catalog page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([title, book_id]).encode()).decode()
+
+def decode_catalog_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor from encode_catalog_cursor. Raises ValueError if malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if (not isinstance(key, list) or len(key) != 2 or not isinstance(key[0], str)
+            or not isinstance(key[1], int)):
+        raise ValueError("Invalid cursor.")
+    return key[0], key[1]
+
+def get_catalog_page(limit: int = CATALOG_PAGE_SIZE, after: Optional[str] = None,
+                     before: Optional[str] = None) -> Dict:
+    """
+    Get one page of the catalog in title order.
+    Paginated view of R2: Book Catalog Display
+    
+    Args:
+        limit: Maximum books on the page
+        after: next_cursor of the previous page, to page forward
+        before: prev_cursor of the current page, to page back
+        
+    Returns:
+        dict: {'books': list of Book, 'next_cursor': str or None,
+        'prev_cursor': str or None}
+        
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    after_key = decode_catalog_cursor(after) if after else None
+    before_key = decode_catalog_cursor(before) if before else None
+    page = {'books': [], 'next_cursor': None, 'prev_cursor': None}
+    
+    if before_key is not None:
+        books = get_catalog_books(limit + 1, before=before_key)
+        if len(books) > limit:
+            books = books[limit - 1::-1]
+            page['prev_cursor'] = encode_catalog_cursor(books[0].title, books[0].id)
+            page['next_cursor'] = encode_catalog_cursor(books[-1].title, books[-1].id)
+            page['books'] = books
+            return page
+        # Less than a full page before the cursor: show the first page instead
+        after_key = None
+    
+    books = get_catalog_books(limit + 1, after=after_key)
+    if len(books) > limit:
+        books = books[:limit]
+        page['next_cursor'] = encode_catalog_cursor(books[-1].title, books[-1].id)
+    if after_key is not None:
+        page['prev_cursor'] = (encode_catalog_cursor(books[0].title, books[0].id) if books
+                               else encode_catalog_cursor(*after_key))
+    page['books'] = books
+    return page
+
+def encode_history_cursor(page_key: Union[str, int], record_id: int) -> str:
+    """Encode the (page_key, id) of the last history entry on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([page_key, record_id]).encode()).decode()
+
+def decode_history_cursor(cursor: str) -> Tuple[Union[str, int], int]:
+    """Decode a cursor from encode_history_cursor. Raises ValueError if malformed."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if (not isinstance(key, list) or len(key) != 2 or not isinstance(key[0], (str, int))
+            or isinstance(key[0], bool) or not isinstance(key[1], int)):
+        raise ValueError("Invalid cursor.")
+    return key[0], key[1]
+
+def get_patron_history_page(patron_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    """
+    Get one page of a patron's borrowing history, newest first.
+
+    Pages are keyed on (borrow time, id) rather than an offset, so each page
+    is a single index range scan however deep into the history it is.
+
+    Args:
+        patron_id: 6-digit library card ID
+        limit: Maximum entries on the page
+        cursor: next_cursor from the previous page, if any
+
+    Returns:
+        dict: {'history': [...], 'next_cursor': str or None}, entries shaped
+        like the R7 report's borrowing_history
+
+    Raises:
+        ValueError: If cursor is malformed
+    """
+    before = decode_history_cursor(cursor) if cursor else None
+    now_us = to_epoch_us(datetime.now())
+    rows = get_patron_loans_page(patron_id, limit + 1, before)
+    history = [
+        _history_entry(book_id, borrow_text, due_text, return_text, title, author,
+                       _loan_days_overdue(due_text, return_text, due_us, return_us, now_us))
+        for _, book_id, borrow_text, due_text, return_text, title, author, due_us, return_us, _ in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_history_cursor(last['page_key'], last['id'])
+    return {'history': history, 'next_cursor': next_cursor}
+
+def iter_patron_history(patron_id: str, page_size: int = 500) -> Iterator[Dict]:
+    """
+    Yield a patron's whole borrowing history, newest first, for exports.
+
+    Reads one keyset page at a time so no database connection is held while
+    the caller writes out entries.
+    """
+    cursor = None
+    while True:
+        page = get_patron_history_page(patron_id, page_size, cursor)
+        yield from page['history']
+        cursor = page['next_cursor']
+        if cursor is None:
+            return
@@ -0,0 +1,238 @@
+"""
+Schema Migrations - Versioned changes to the library database
+Every vNNNN_<name>.py module in this package is one migration. Pending
+migrations are applied in version order and recorded in schema_version with
+the time they took.
+
+A migration module's docstring describes it, and it defines:
+    apply(conn)
+        Schema changes, run in one BEGIN IMMEDIATE transaction. Must be safe
+        to re-run, so databases created before schema_version existed can be
+        brought under it.
+    backfill(batch_size, progress) -> int
+        Optional data change run after apply commits. It must commit every
+        batch_size rows, so borrows and returns keep committing while it
+        runs, call progress with the running row count, and return the
+        number of rows it changed.
+    count_pending() -> int
+        Required with backfill: rows the backfill still has to change.
+
+Usage:
+    library-migrate [--database library.db] [--dry-run] [--batch-size 1000]
+"""
+
+import argparse
+import importlib
+import pkgutil
+import re
+import sys
+import time
+from datetime import datetime
+from types import ModuleType
+from typing import Dict, List, NamedTuple, Optional, TextIO
+
+import database
+from database import db_connection
+
+SCHEMA_VERSION_DDL = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL,
+        elapsed_seconds REAL NOT NULL
+    )
+'''
+
+MODULE_PATTERN = re.compile(r'v(\d{4})_(\w+)')
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def description(self) -> str:
+        """First line of the migration module's docstring."""
+        return (self.module.__doc__ or '').strip().split('\n')[0]
+
+
+_migrations: Optional[List[Migration]] = None
+
+
+def discover_migrations() -> List[Migration]:
+    """Return every migration module in this package, ordered by version."""
+    global _migrations
+    if _migrations is None:
+        found = {}
+        for info in pkgutil.iter_modules(__path__):
+            match = MODULE_PATTERN.fullmatch(info.name)
+            if not match:
+                continue
+            version = int(match.group(1))
+            if version in found:
+                raise ValueError(f'Duplicate migration version {version:04d}: {info.name}')
+            found[version] = Migration(version, match.group(2),
+                                       importlib.import_module(f'{__name__}.{info.name}'))
+        _migrations = [found[version] for version in sorted(found)]
+    return _migrations
+
+
+def get_applied_versions() -> Dict[int, Dict]:
+    """
+    Get the schema_version rows of the current database, keyed by version.
+    Read-only: a database without a schema_version table has none.
+    """
+    with db_connection() as conn:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+                        ).fetchone() is None:
+            return {}
+        return {row['version']: dict(row) for row in conn.execute('SELECT * FROM schema_version')}
+
+
+def _is_recorded(conn, migration: Migration) -> bool:
+    return conn.execute('SELECT 1 FROM schema_version WHERE version = ?',
+                        (migration.version,)).fetchone() is not None
+
+
+def _insert_record(conn, migration: Migration, elapsed: float):
+    conn.execute('''
+        INSERT INTO schema_version (version, name, applied_at, elapsed_seconds)
+        VALUES (?, ?, ?, ?)
+    ''', (migration.version, migration.name, datetime.now().isoformat(), elapsed))
+
+
+def _apply_schema(migration: Migration, start: float, record: bool) -> bool:
+    """
+    Run migration's apply() in one BEGIN IMMEDIATE transaction, recording it
+    in the same transaction when record is set. The write lock makes the
+    schema_version check and the change atomic, so when several processes
+    start on the same database only one applies each migration; the others
+    see it recorded and return False without touching anything.
+    """
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(SCHEMA_VERSION_DDL)
+            if _is_recorded(conn, migration):
+                conn.rollback()
+                return False
+            migration.module.apply(conn)
+            if record:
+                _insert_record(conn, migration, time.perf_counter() - start)
+            conn.commit()
+            return True
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _record(migration: Migration, elapsed: float):
+    """Record a migration after its backfill, unless another process got there first."""
+    with db_connection() as conn:
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if not _is_recorded(conn, migration):
+                _insert_record(conn, migration, elapsed)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def apply_migrations(dry_run: bool = False, backfill: bool = True, batch_size: int = 1000,
+                     out: Optional[TextIO] = None) -> List[Dict]:
+    """
+    Apply pending migrations in version order.
+
+    Args:
+        dry_run: Only report what would run, including backfill row counts
+        backfill: Run backfills. When False, a migration whose backfill still
+            has rows to change gets its schema change but is not recorded,
+            and the migrations after it wait for a run with backfill=True
+        batch_size: Rows per committed backfill batch
+        out: Optional stream for one line per migration and backfill progress
+
+    Returns:
+        list: One dict per pending migration with version, name, status
+        ('applied', 'pending' on a dry run, or 'deferred'), rows changed by
+        its backfill and elapsed_seconds
+    """
+    applied = get_applied_versions()
+    results = []
+    for migration in discover_migrations():
+        if migration.version in applied:
+            continue
+        has_backfill = hasattr(migration.module, 'backfill')
+        result = {'version': migration.version, 'name': migration.name, 'rows': 0,
+                  'elapsed_seconds': 0.0}
+        results.append(result)
+        if dry_run:
+            result['status'] = 'pending'
+            result['rows'] = migration.module.count_pending() if has_backfill else 0
+            _report(out, migration, f"pending - {migration.description}"
+                    + (f" ({result['rows']} rows to backfill)" if has_backfill else ''))
+            continue
+
+        start = time.perf_counter()
+        if not _apply_schema(migration, start, record=not has_backfill):
+            # Applied by another process since applied was read
+            results.pop()
+            continue
+        if has_backfill:
+            if not backfill and migration.module.count_pending():
+                result['status'] = 'deferred'
+                result['elapsed_seconds'] = time.perf_counter() - start
+                _report(out, migration, 'schema applied, backfill deferred')
+                break
+            result['rows'] = migration.module.backfill(batch_size, _progress(out, migration, start))
+        result['status'] = 'applied'
+        result['elapsed_seconds'] = time.perf_counter() - start
+        if has_backfill:
+            _record(migration, result['elapsed_seconds'])
+        _report(out, migration, f"applied in {result['elapsed_seconds']:.2f}s"
+                + (f", {result['rows']} rows backfilled" if has_backfill else ''))
+    return results
+
+
+def _report(out: Optional[TextIO], migration: Migration, status: str):
+    if out is not None:
+        out.write(f'{migration.version:04d} {migration.name}: {status}\n')
+
+
+def _progress(out: Optional[TextIO], migration: Migration, start: float):
+    last_report = start
+
+    def progress(rows: int):
+        nonlocal last_report
+        now = time.perf_counter()
+        if out is not None and now - last_report >= 1.0:
+            out.write(f'{migration.version:04d} {migration.name}: {rows} rows, '
+                      f'{rows / (now - start):.0f} rows/sec\n')
+            last_report = now
+    return progress
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for library-migrate."""
+    parser = argparse.ArgumentParser(prog='library-migrate', description='Apply pending schema migrations.')
+    parser.add_argument('--database', default=database.DATABASE, help='SQLite database file')
+    parser.add_argument('--dry-run', action='store_true', help='list pending migrations without applying them')
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows per committed backfill batch')
+    args = parser.parse_args(argv)
+
+    database.DATABASE = args.database
+    applied = get_applied_versions()
+    for migration in discover_migrations():
+        if migration.version in applied:
+            row = applied[migration.version]
+            print(f"{migration.version:04d} {migration.name}: applied {row['applied_at']} "
+                  f"in {row['elapsed_seconds']:.2f}s")
+    results = apply_migrations(dry_run=args.dry_run, batch_size=args.batch_size, out=sys.stdout)
+    if not results:
+        print('Database is up to date.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
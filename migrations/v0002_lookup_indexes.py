@@ -0,0 +1,7 @@
+"""Add the borrow_records and catalog lookup indexes."""
+
+from database import ensure_indexes
+
+
+def apply(conn):
+    ensure_indexes(conn)
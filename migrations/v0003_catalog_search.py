@@ -0,0 +1,9 @@
+"""Add the catalog version table and the books_fts full-text index."""
+
+from database import CATALOG_VERSION_DDL, ensure_search_index
+
+
+def apply(conn):
+    for ddl in CATALOG_VERSION_DDL:
+        conn.execute(ddl)
+    ensure_search_index(conn)
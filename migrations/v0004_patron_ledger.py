@@ -0,0 +1,7 @@
+"""Add the patrons and patron_ledger tables, filled from borrow history."""
+
+from database import ensure_patron_ledger
+
+
+def apply(conn):
+    ensure_patron_ledger(conn)
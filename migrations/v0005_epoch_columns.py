@@ -0,0 +1,24 @@
+"""Add integer epoch date columns to borrow_records and backfill them."""
+
+from database import (
+    EPOCH_COLUMNS, backfill_epoch_columns, count_epoch_backfill_pending, db_connection,
+    ensure_epoch_columns
+)
+
+
+def apply(conn):
+    ensure_epoch_columns(conn)
+
+
+def backfill(batch_size, progress):
+    return backfill_epoch_columns(batch_size, progress=progress)
+
+
+def count_pending():
+    with db_connection() as conn:
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(borrow_records)')}
+        if not columns:
+            return 0
+        if not set(EPOCH_COLUMNS) <= columns:
+            return conn.execute('SELECT COUNT(*) FROM borrow_records').fetchone()[0]
+    return count_epoch_backfill_pending()
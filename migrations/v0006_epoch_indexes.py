@@ -0,0 +1,12 @@
+"""Index borrow_records on the epoch columns in place of borrow_date."""
+
+from database import ensure_epoch_indexes
+
+SUPERSEDED_INDEXES = ('idx_borrow_records_patron_book_date', 'idx_borrow_records_patron_date')
+
+
+def apply(conn):
+    # Only runs once the 0005 backfill has filled every row's epoch columns
+    ensure_epoch_indexes(conn)
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,134 @@
+"""
+Models Module - Compact row types for books and borrow records
+Slotted read-only mappings used in place of one dict per database row
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from fee_engine import from_epoch_us
+
+# A date as stored (ISO text or to_epoch_us() integer) or already parsed
+DateValue = Union[datetime, str, int, None]
+
+
+class Row(Mapping):
+    """
+    Read-only mapping over a fixed set of fields stored in __slots__.
+
+    Fields can be read as attributes (book.title, which is what Jinja uses)
+    or as keys (book['title']), and dict(row) or row.to_dict() gives a plain
+    dict. Instances compare equal to dicts with the same items.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+    def to_dict(self) -> Dict:
+        """Return the fields as a plain dict."""
+        return {name: getattr(self, name) for name in self._fields}
+
+
+class Book(Row):
+    """A row of the books table."""
+
+    __slots__ = ('id', 'title', 'author', 'isbn', 'total_copies', 'available_copies')
+    _fields = __slots__
+
+    # Column order for Book(*row), matching __init__
+    COLUMNS = 'id, title, author, isbn, total_copies, available_copies'
+
+    def __init__(self, id: int, title: str, author: str, isbn: str,
+                 total_copies: int, available_copies: int):
+        self.id = id
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+        self.total_copies = total_copies
+        self.available_copies = available_copies
+
+
+def _parse_date(value: DateValue) -> Optional[datetime]:
+    if isinstance(value, int):
+        return from_epoch_us(value)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class BorrowRecord(Row):
+    """
+    A row of borrow_records, optionally joined with the book's title and author.
+
+    The date columns can be passed as stored in SQLite, either epoch
+    microseconds or legacy ISO text; with lazy=True they are converted the
+    first time they are read, so callers that never look at a date never pay
+    for converting it.
+    """
+
+    __slots__ = ('id', 'patron_id', 'book_id', 'title', 'author',
+                 '_borrow_date', '_due_date', '_return_date')
+    _fields = ('id', 'patron_id', 'book_id', 'title', 'author',
+               'borrow_date', 'due_date', 'return_date', 'is_overdue')
+
+    # Column order for BorrowRecord(*row), matching __init__; epoch columns
+    # fall back to the ISO text on rows the epoch backfill has not reached
+    COLUMNS = ('id, patron_id, book_id, coalesce(borrow_us, borrow_date), '
+               'coalesce(due_us, due_date), coalesce(return_us, return_date)')
+
+    def __init__(self, id: int, patron_id: str, book_id: int, borrow_date: DateValue,
+                 due_date: DateValue, return_date: DateValue = None,
+                 title: Optional[str] = None, author: Optional[str] = None, lazy: bool = True):
+        self.id = id
+        self.patron_id = patron_id
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        if lazy:
+            self._borrow_date, self._due_date, self._return_date = borrow_date, due_date, return_date
+        else:
+            self._borrow_date = _parse_date(borrow_date)
+            self._due_date = _parse_date(due_date)
+            self._return_date = _parse_date(return_date)
+
+    @property
+    def borrow_date(self) -> datetime:
+        value = self._borrow_date
+        if value is not None and not isinstance(value, datetime):
+            value = self._borrow_date = _parse_date(value)
+        return value
+
+    @property
+    def due_date(self) -> datetime:
+        value = self._due_date
+        if value is not None and not isinstance(value, datetime):
+            value = self._due_date = _parse_date(value)
+        return value
+
+    @property
+    def return_date(self) -> Optional[datetime]:
+        value = self._return_date
+        if value is not None and not isinstance(value, datetime):
+            value = self._return_date = _parse_date(value)
+        return value
+
+    @property
+    def is_overdue(self) -> bool:
+        """Whether the loan is still out and past its due date right now."""
+        return self._return_date is None and datetime.now() > self.due_date
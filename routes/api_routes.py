@@ -2,11 +2,25 @@
 API Routes - JSON API endpoints
 """
 
-from flask import Blueprint, jsonify, request
-from library_service import calculate_late_fee_for_book, search_books_in_catalog
+import csv
+import io
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from bulk_import import import_books, iter_records
+from database import get_pool_stats
+from library_service import (
+    calculate_late_fee_for_book, search_books_page, get_search_cache_stats, get_patron_report_cache_stats,
+    get_patron_history_page, get_patron_history_summary, iter_patron_history
+)
+from search_index import get_prefix_index
+from .conditional import conditional_on_catalog
+from .fragments import get_catalog_row_cache_stats
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+BULK_IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl'}
+MAX_REPORTED_REJECTIONS = 100
+
 @api_bp.route('/late_fee/<patron_id>/<int:book_id>')
 def get_late_fee(patron_id, book_id):
     """
@@ -17,6 +31,7 @@ def get_late_fee(patron_id, book_id):
     return jsonify(result), 501 if 'not implemented' in result.get('status', '') else 200
 
 @api_bp.route('/search')
+@conditional_on_catalog
 def search_books_api():
     """
     Search for books via API endpoint.
@@ -24,16 +39,142 @@ def search_books_api():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    cursor = request.args.get('cursor') or None
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'Limit must be an integer'}), 400
     
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
     
     # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
+    try:
+        page = search_books_page(search_term, search_type, limit, cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'search_term': search_term,
         'search_type': search_type,
-        'results': books,
-        'count': len(books)
+        'results': page['results'],
+        'count': len(page['results']),
+        'next_cursor': page['next_cursor']
+    })
+
+def _valid_patron_id(patron_id: str) -> bool:
+    return patron_id.isdigit() and len(patron_id) == 6
+
+@api_bp.route('/patron/<patron_id>/history')
+def patron_history_api(patron_id):
+    """
+    Page through a patron's borrowing history, newest first.
+    Paginated view of R7: Patron Status Report
+    """
+    if not _valid_patron_id(patron_id):
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    cursor = request.args.get('cursor') or None
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'Limit must be an integer'}), 400
+    
+    try:
+        page = get_patron_history_page(patron_id, limit, cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'patron_id': patron_id,
+        'summary': get_patron_history_summary(patron_id),
+        'history': page['history'],
+        'count': len(page['history']),
+        'next_cursor': page['next_cursor']
+    })
+
+@api_bp.route('/patron/<patron_id>/history.ndjson')
+def patron_history_export(patron_id):
+    """
+    Stream a patron's full borrowing history as newline-delimited JSON.
+    """
+    if not _valid_patron_id(patron_id):
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    
+    def generate():
+        for entry in iter_patron_history(patron_id):
+            yield json.dumps(entry) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename=history-{patron_id}.ndjson'})
+
+@api_bp.route('/books/bulk', methods=['POST'])
+def bulk_import_api():
+    """
+    Import many books from a CSV (text/csv) or JSONL (application/x-ndjson) body.
+    Bulk variant of R1: Book Catalog Management
+    """
+    fmt = BULK_IMPORT_FORMATS.get(request.mimetype)
+    if fmt is None:
+        return jsonify({'error': 'Body must be text/csv or application/x-ndjson'}), 415
+    
+    try:
+        batch_size = min(max(int(request.args.get('batch_size', 5000)), 1), 50000)
+    except ValueError:
+        return jsonify({'error': 'Batch size must be an integer'}), 400
+    
+    rejections = []
+    
+    def on_reject(rejection):
+        if len(rejections) < MAX_REPORTED_REJECTIONS:
+            rejections.append(rejection)
+    
+    body = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+    try:
+        stats = import_books(iter_records(body, fmt), batch_size, on_reject)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': f'Could not parse body: {e}'}), 400
+    
+    return jsonify(dict(stats, rejections=rejections))
+
+@api_bp.route('/autocomplete')
+def autocomplete_api():
+    """
+    Suggest titles or authors starting with the typed prefix.
+    Type-ahead support for R6: Book Search Functionality
+    """
+    prefix = request.args.get('q', '').strip()
+    search_type = request.args.get('type', 'title')
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'Limit must be an integer'}), 400
+    
+    if not prefix:
+        return jsonify({'error': 'Search term is required'}), 400
+    
+    if search_type not in ('title', 'author'):
+        return jsonify({'error': 'Type must be title or author'}), 400
+    
+    completions = get_prefix_index().complete(prefix, search_type, limit)
+    
+    return jsonify({
+        'query': prefix,
+        'type': search_type,
+        'completions': completions
+    })
+
+
+@api_bp.route('/stats')
+def stats_api():
+    """
+    Report connection pool and cache counters for capacity tuning.
+    """
+    return jsonify({
+        'connection_pool': get_pool_stats(),
+        'catalog_row_cache': get_catalog_row_cache_stats(),
+        'search_cache': get_search_cache_stats(),
+        'patron_report_cache': get_patron_report_cache_stats()
     })
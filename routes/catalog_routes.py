@@ -2,9 +2,12 @@
 Catalog Routes - Book catalog related endpoints
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_all_books
-from library_service import add_book_to_catalog
+from flask import (
+    Blueprint, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages
+)
+from library_service import CATALOG_PAGE_SIZE, add_book_to_catalog, get_catalog_page
+from .conditional import conditional_on_catalog
+from .fragments import iter_catalog_rows
 
 catalog_bp = Blueprint('catalog', __name__)
 
@@ -14,13 +17,30 @@ def index():
     return redirect(url_for('catalog.catalog'))
 
 @catalog_bp.route('/catalog')
+@conditional_on_catalog
 def catalog():
     """
-    Display all books in the catalog.
+    Display the catalog a page at a time, in title order.
     Implements R2: Book Catalog Display
     """
-    books = get_all_books()
-    return render_template('catalog.html', books=books)
+    after = request.args.get('after') or None
+    before = request.args.get('before') or None
+    
+    try:
+        limit = min(max(int(request.args.get('limit', CATALOG_PAGE_SIZE)), 1), 200)
+    except ValueError:
+        limit = CATALOG_PAGE_SIZE
+    
+    try:
+        page = get_catalog_page(limit, after, before)
+    except ValueError as e:
+        flash(str(e), 'error')
+        page = get_catalog_page(limit)
+    
+    # The session cookie is saved before a streamed body renders, so pop the
+    # flashed messages now or they would be shown again on the next page
+    get_flashed_messages()
+    return stream_template('catalog.html', rows=iter_catalog_rows(page['books']), page=page, limit=limit)
 
 @catalog_bp.route('/add_book', methods=['GET', 'POST'])
 def add_book():
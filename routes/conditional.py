@@ -0,0 +1,54 @@
+"""
+Conditional Responses - ETag revalidation for pages built from the catalog
+"""
+
+import hashlib
+from functools import wraps
+from flask import current_app, make_response, request, session
+from compression import CONTENT_CODINGS
+from database import get_catalog_meta
+
+
+def catalog_etag(version: int) -> str:
+    """Strong ETag for the current endpoint and query arguments at a catalog version."""
+    key = repr((request.endpoint, sorted(request.args.items(multi=True)),
+                current_app.config.get('SEARCH_BACKEND')))
+    return f'{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}'
+
+
+def conditional_on_catalog(view):
+    """
+    Answer If-None-Match with 304 Not Modified while the catalog is unchanged.
+
+    The catalog version is read before the view runs, so a 304 costs one
+    primary-key read and no catalog query or rendering. Because it is read
+    first, a body is never older than its ETag; a write that lands while the
+    view runs costs the client one extra download, not a stale page.
+    Responses carrying flashed messages are one-off and get no validators.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if '_flashes' in session:
+            return view(*args, **kwargs)
+        meta = get_catalog_meta()
+        etag = catalog_etag(meta['version'])
+        # Compressed bodies carry the ETag with a -<coding> suffix
+        matched = next((tag for tag in [etag] + [f'{etag}-{coding}' for coding in CONTENT_CODINGS]
+                        if request.if_none_match.contains_weak(tag)), None)
+        if matched is not None:
+            response = current_app.response_class(status=304)
+            response.set_etag(matched)
+            # compress_response leaves 304s alone, but the matched ETag may
+            # name a coding, so caches must key this answer on it too
+            response.vary.add('Accept-Encoding')
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.set_etag(etag)
+        response.last_modified = meta['updated_at']
+        # Revalidate on every use; Last-Modified alone would let browsers
+        # serve availability counts from cache heuristically
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
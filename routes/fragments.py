@@ -0,0 +1,43 @@
+"""
+Fragment Cache - Rendered catalog table rows reused across requests
+"""
+
+from typing import Dict, Iterable, Iterator, Tuple
+from flask import current_app
+from markupsafe import Markup
+import database
+from cache import LRUCache
+from models import Book
+
+# Rendered catalog rows, keyed on (database, book ID, row version). A book's
+# row version is its column values, so a borrow, return or edit by any process
+# re-renders only that book's row; fragments of old versions are never hit
+# again and age out of the LRU.
+CATALOG_ROW_CACHE_SIZE = 10000
+_row_cache = LRUCache(CATALOG_ROW_CACHE_SIZE)
+
+
+def row_version(book: Book) -> Tuple:
+    """Everything a catalog row displays; the cached fragment is reused while it is unchanged."""
+    return (book.title, book.author, book.isbn, book.total_copies, book.available_copies)
+
+
+def render_catalog_row(book: Book) -> Markup:
+    """Render one catalog table row, from the fragment cache when the book is unchanged."""
+    key = (database.DATABASE, book.id, row_version(book))
+    html = _row_cache.get(key)
+    if html is None:
+        html = current_app.jinja_env.get_template('catalog_row.html').module.catalog_row(book)
+        _row_cache.put(key, html)
+    return html
+
+
+def iter_catalog_rows(books: Iterable[Book]) -> Iterator[Markup]:
+    """Yield rendered rows for books as they are read."""
+    for book in books:
+        yield render_catalog_row(book)
+
+
+def get_catalog_row_cache_stats() -> Dict:
+    """Hit/miss counters for the catalog row fragment cache."""
+    return _row_cache.stats()
@@ -3,11 +3,13 @@ Search Routes - Book search functionality
 """
 
 from flask import Blueprint, render_template, request, flash
-from library_service import search_books_in_catalog
+from library_service import search_books_page
+from .conditional import conditional_on_catalog
 
 search_bp = Blueprint('search', __name__)
 
 @search_bp.route('/search')
+@conditional_on_catalog
 def search_books():
     """
     Search for books in the catalog.
@@ -15,14 +17,22 @@ def search_books():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    cursor = request.args.get('cursor') or None
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
     
     if not search_term:
         return render_template('search.html', books=[], search_term='', search_type=search_type)
     
     # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
-    
-    if not books:
-        flash('Search functionality is not yet implemented.', 'error')
+    try:
+        page = search_books_page(search_term, search_type, limit, cursor)
+    except ValueError as e:
+        flash(str(e), 'error')
+        page = search_books_page(search_term, search_type, limit)
     
-    return render_template('search.html', books=books, search_term=search_term, search_type=search_type)
+    return render_template('search.html', books=page['results'], search_term=search_term,
+                           search_type=search_type, limit=limit, next_cursor=page['next_cursor'])
@@ -0,0 +1,425 @@
+"""
+Search Index Module - In-process indexes for catalog search
+N-gram index for R6 substring search, a prefix index for autocomplete and a
+BK-tree for typo-tolerant search
+"""
+
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import database
+from database import add_book_insert_listener, get_all_books, remove_book_insert_listener
+
+NGRAM_SIZE = 3
+FIELDS = ('title', 'author')
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """Return the set of distinct n-grams in text."""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _intersect(docs, postings: array) -> list:
+    """Intersect sorted candidate docs with a sorted posting list, keeping order."""
+    if len(docs) * 16 < len(postings):
+        # Few candidates: binary-search each one in the long list
+        out = []
+        for doc in docs:
+            i = bisect_left(postings, doc)
+            if i < len(postings) and postings[i] == doc:
+                out.append(doc)
+        return out
+    candidates = set(docs)
+    return [doc for doc in postings if doc in candidates]
+
+
+class NgramIndex:
+    """
+    Trigram inverted index over book titles and authors.
+
+    Every book gets a dense document number in insertion order. Each trigram
+    maps to an array('I') of document numbers, so posting lists are sorted,
+    4 bytes per entry and can be intersected with binary search. A query's
+    candidates are the intersection of its trigrams' posting lists, which are
+    then checked with a plain substring test to keep R6's case-insensitive
+    partial-match semantics exactly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._book_ids = array('q')
+        self._text: Dict[str, List[str]] = {field: [] for field in FIELDS}
+        self._postings: Dict[str, Dict[str, array]] = {field: {} for field in FIELDS}
+        self.build_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._book_ids)
+
+    def build(self, books: Iterable[Dict]):
+        """Index every book in books, recording the elapsed build time."""
+        start = time.perf_counter()
+        for book in books:
+            self.add(book)
+        self.build_seconds = time.perf_counter() - start
+
+    def add(self, book: Dict):
+        """Index a single book under the next document number."""
+        with self._lock:
+            doc = len(self._book_ids)
+            self._book_ids.append(book['id'])
+            for field in FIELDS:
+                text = book[field].lower()
+                self._text[field].append(text)
+                postings = self._postings[field]
+                for gram in ngrams(text):
+                    plist = postings.get(gram)
+                    if plist is None:
+                        postings[gram] = array('I', (doc,))
+                    else:
+                        plist.append(doc)
+
+    def search(self, term: str, field: str) -> List[int]:
+        """Return the IDs of books whose field contains term, case-insensitively."""
+        if field not in FIELDS:
+            return []
+        term = term.lower()
+        texts = self._text[field]
+        grams = ngrams(term)
+        if not grams:
+            # Too short to have a trigram; fall back to scanning the lowered text
+            docs = range(len(texts))
+        else:
+            postings = self._postings[field]
+            plists = []
+            for gram in grams:
+                plist = postings.get(gram)
+                if plist is None:
+                    return []
+                plists.append(plist)
+            plists.sort(key=len)
+            docs = plists[0]
+            for plist in plists[1:]:
+                docs = _intersect(docs, plist)
+                if not docs:
+                    return []
+        return [self._book_ids[doc] for doc in docs if term in texts[doc]]
+
+    def stats(self) -> Dict:
+        """Return size and build-time figures for the index."""
+        posting_count = 0
+        posting_bytes = 0
+        gram_count = 0
+        for postings in self._postings.values():
+            gram_count += len(postings)
+            for plist in postings.values():
+                posting_count += len(plist)
+                posting_bytes += plist.itemsize * len(plist)
+        return {
+            'books': len(self._book_ids),
+            'ngrams': gram_count,
+            'postings': posting_count,
+            'posting_bytes': posting_bytes,
+            'text_bytes': sum(sys.getsizeof(t) for texts in self._text.values() for t in texts),
+            'build_seconds': self.build_seconds,
+        }
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index of distinct titles and authors for autocomplete.
+
+    Each field keeps a sorted list of lowercased keys with a parallel list of
+    display strings. A prefix lookup is one bisect plus a walk over at most k
+    matches, and new books are patched in with insort.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: Dict[str, List[str]] = {field: [] for field in FIELDS}
+        self._values: Dict[str, List[str]] = {field: [] for field in FIELDS}
+        self.build_seconds = 0.0
+
+    def build(self, books: Iterable[Dict]):
+        """Index every book in books from scratch, recording the elapsed build time."""
+        start = time.perf_counter()
+        entries = {field: {} for field in FIELDS}
+        for book in books:
+            for field in FIELDS:
+                entries[field].setdefault(book[field].lower(), book[field])
+        with self._lock:
+            for field in FIELDS:
+                keys = sorted(entries[field])
+                self._keys[field] = keys
+                self._values[field] = [entries[field][key] for key in keys]
+        self.build_seconds = time.perf_counter() - start
+
+    def add(self, book: Dict):
+        """Patch a single book's title and author into the index."""
+        with self._lock:
+            for field in FIELDS:
+                keys, values = self._keys[field], self._values[field]
+                key = book[field].lower()
+                i = bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    continue
+                keys.insert(i, key)
+                values.insert(i, book[field])
+
+    def complete(self, prefix: str, field: str, limit: int = 10) -> List[str]:
+        """Return up to limit distinct values of field starting with prefix, in order."""
+        if field not in FIELDS or limit <= 0:
+            return []
+        prefix = prefix.lower()
+        results = []
+        # add() inserts into both lists under the lock; hold it so the walk
+        # never sees a key without its value or skips one being shifted
+        with self._lock:
+            keys, values = self._keys[field], self._values[field]
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+                results.append(values[i])
+                i += 1
+        return results
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._keys.values())
+
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance between a and b (insertions, deletions, substitutions)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def max_typos(word: str) -> int:
+    """Edit distance tolerated for a query word of this length."""
+    if len(word) <= 2:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+class FuzzyIndex:
+    """
+    BK-tree over the distinct words of every title and author.
+
+    A BK-tree lookup only visits children whose edge distance lies within
+    max_distance of the query's distance to the parent, so most words are
+    never compared. Each word maps to the IDs of books containing it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root: Optional[list] = None   # [word, {distance: child}]
+        self._postings: Dict[str, array] = {}
+        self.build_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def build(self, books: Iterable[Dict]):
+        """Index every book in books, recording the elapsed build time."""
+        start = time.perf_counter()
+        for book in books:
+            self.add(book)
+        self.build_seconds = time.perf_counter() - start
+
+    def add(self, book: Dict):
+        """Index the words of a single book's title and author."""
+        words = set(WORD_PATTERN.findall(f"{book['title']} {book['author']}".lower()))
+        with self._lock:
+            for word in words:
+                postings = self._postings.get(word)
+                if postings is not None:
+                    postings.append(book['id'])
+                    continue
+                self._postings[word] = array('q', (book['id'],))
+                self._insert(word)
+
+    def _insert(self, word: str):
+        if self._root is None:
+            self._root = [word, {}]
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(word, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                return
+            node = child
+
+    def lookup(self, word: str, max_distance: int) -> Dict[str, int]:
+        """Return {indexed word: distance} for words within max_distance of word."""
+        matches = {}
+        if self._root is None:
+            return matches
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance:
+                matches[node_word] = distance
+            for edge in range(distance - max_distance, distance + max_distance + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+        return matches
+
+    def search(self, term: str) -> List[Tuple[int, int]]:
+        """
+        Find books whose title or author contains every word of term, allowing
+        max_typos() edits per word.
+
+        Returns:
+            list: (book_id, total distance) pairs, closest first
+        """
+        scores: Optional[Dict[int, int]] = None
+        for word in set(WORD_PATTERN.findall(term.lower())):
+            best: Dict[int, int] = {}
+            for match, distance in self.lookup(word, max_typos(word)).items():
+                for book_id in self._postings[match]:
+                    if distance < best.get(book_id, distance + 1):
+                        best[book_id] = distance
+            if scores is None:
+                scores = best
+            else:
+                scores = {book_id: scores[book_id] + d for book_id, d in best.items() if book_id in scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        return sorted(scores.items(), key=lambda item: (item[1], item[0]))
+
+
+class _SharedIndex:
+    """
+    Process-wide index built from the catalog and kept current by an
+    insert_book listener.
+
+    The listener is registered before the catalog is read. Books inserted
+    while the build runs are held back and added once it finishes, unless
+    the catalog read already included them, so no insert is lost or indexed
+    twice. The index is rebuilt if database.DATABASE changes.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._index = None
+        self._database: Optional[str] = None
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Optional[List[Dict]] = None
+
+    def _on_book_inserted(self, book: Dict):
+        with self._pending_lock:
+            if self._pending is not None:
+                self._pending.append(book)
+                return
+            index = self._index
+        if index is not None and self._database == database.DATABASE:
+            index.add(book)
+
+    def _build(self):
+        with self._pending_lock:
+            self._pending = []
+        add_book_insert_listener(self._on_book_inserted)
+        try:
+            books = get_all_books()
+            index = self._factory()
+            index.build(books)
+        except BaseException:
+            with self._pending_lock:
+                self._pending = None
+            raise
+        with self._pending_lock:
+            indexed = {book['id'] for book in books}
+            for book in self._pending:
+                if book['id'] not in indexed:
+                    index.add(book)
+            self._pending = None
+            self._index, self._database = index, database.DATABASE
+
+    def get(self):
+        """Get the index, building it first if needed."""
+        index = self._index
+        if index is not None and self._database == database.DATABASE:
+            return index
+        with self._lock:
+            if self._index is None or self._database != database.DATABASE:
+                self._build()
+            return self._index
+
+    def peek(self):
+        """Get the index if it is built for the current database, without building it."""
+        index = self._index
+        if index is not None and self._database == database.DATABASE:
+            return index
+        return None
+
+    def reset(self):
+        """Drop the index and stop listening for inserts until the next build."""
+        with self._lock:
+            remove_book_insert_listener(self._on_book_inserted)
+            self._index, self._database = None, None
+
+
+_ngram_index = _SharedIndex(NgramIndex)
+
+
+def enable_ngram_index() -> NgramIndex:
+    """Build the process-wide index from the catalog and keep it updated on insert_book."""
+    _ngram_index.reset()
+    return _ngram_index.get()
+
+
+def disable_ngram_index():
+    """Drop the process-wide index; searches go back to the database."""
+    _ngram_index.reset()
+
+
+def get_ngram_index() -> Optional[NgramIndex]:
+    """Get the active index, or None if it is disabled or built for another database."""
+    return _ngram_index.peek()
+
+
+_prefix_index = _SharedIndex(PrefixIndex)
+
+
+def get_prefix_index() -> PrefixIndex:
+    """Get the process-wide autocomplete index, building it on first use."""
+    return _prefix_index.get()
+
+
+def reset_prefix_index():
+    """Drop the autocomplete index so the next lookup rebuilds it."""
+    _prefix_index.reset()
+
+
+_fuzzy_index = _SharedIndex(FuzzyIndex)
+
+
+def get_fuzzy_index() -> FuzzyIndex:
+    """Get the process-wide typo-tolerant index, building it on first use."""
+    return _fuzzy_index.get()
+
+
+def reset_fuzzy_index():
+    """Drop the typo-tolerant index so the next lookup rebuilds it."""
+    _fuzzy_index.reset()
@@ -12,6 +12,15 @@ setup(
     author="Dazz0h",
     author_email="emmanueldawesome@gmail.com",
     packages=find_packages(),
+    py_modules=["app", "bulk_import", "cache", "compression", "database", "fee_engine", "ledger", "library_service", "models", "search_index", "sweep"],
+    entry_points={
+        "console_scripts": [
+            "library-sweep=sweep:main",
+            "library-ledger=ledger:main",
+            "library-migrate=migrations:main",
+            "library-import=bulk_import:main",
+        ],
+    },
     python_requires=">=3.8",
     install_requires=[
         "Flask>=2.3.0",
@@ -19,6 +28,9 @@ setup(
         "pytest-cov>=4.0.0",
     ],
     extras_require={
+        "fast": [
+            "numpy>=1.22",
+        ],
         "dev": [
             "flake8>=6.0.0",
             "bandit>=1.7.0",
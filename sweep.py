@@ -0,0 +1,141 @@
+"""
+Overdue Sweep Job - Nightly scan of all overdue loans
+Streams active loans past their due date in bounded chunks, applies the R5
+late fee rules and writes one summary line per patron.
+
+Usage:
+    library-sweep [--as-of 2025-03-15T00:00:00] [--chunk-size 5000]
+                  [--format csv|jsonl] [--output overdue.csv]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+import database
+from database import iter_overdue_loan_chunks
+from fee_engine import NOT_RETURNED, calculate_late_fees, to_epoch_us
+
+SUMMARY_FIELDS = ['patron_id', 'overdue_loans', 'total_late_fees', 'max_days_overdue', 'book_ids']
+
+
+def iter_fee_chunks(chunks: Iterable[List[Dict]], as_of: datetime) -> Iterator[List[Dict]]:
+    """Attach days_overdue and late_fee to every loan, one chunk at a time."""
+    for chunk in chunks:
+        due = [loan['due_us'] if loan['due_us'] is not None
+               else to_epoch_us(datetime.fromisoformat(loan['due_date'])) for loan in chunk]
+        days, fees = calculate_late_fees(due, [NOT_RETURNED] * len(chunk), now=as_of)
+        for loan, loan_days, loan_fee in zip(chunk, days, fees):
+            loan['days_overdue'] = int(loan_days)
+            loan['late_fee'] = float(loan_fee)
+        yield chunk
+
+
+def iter_patron_summaries(fee_chunks: Iterable[List[Dict]]) -> Iterator[Dict]:
+    """
+    Fold loans into one summary per patron.
+
+    Loans arrive grouped by patron, so only the patron currently being
+    summarized is held in memory.
+    """
+    current = None
+    for chunk in fee_chunks:
+        for loan in chunk:
+            if current is None or loan['patron_id'] != current['patron_id']:
+                if current is not None:
+                    yield current
+                current = {
+                    'patron_id': loan['patron_id'],
+                    'overdue_loans': 0,
+                    'total_late_fees': 0.0,
+                    'max_days_overdue': 0,
+                    'book_ids': [],
+                }
+            current['overdue_loans'] += 1
+            current['total_late_fees'] = round(current['total_late_fees'] + loan['late_fee'], 2)
+            current['max_days_overdue'] = max(current['max_days_overdue'], loan['days_overdue'])
+            current['book_ids'].append(loan['book_id'])
+    if current is not None:
+        yield current
+
+
+def run_sweep(as_of: Optional[datetime] = None, chunk_size: int = 1000, out: TextIO = sys.stdout,
+              fmt: str = 'csv', progress: Optional[TextIO] = None) -> Dict:
+    """
+    Run the overdue sweep and write per-patron summaries to out.
+
+    Args:
+        as_of: Cut-off clock; loans due before it are overdue (default now)
+        chunk_size: Loans read per query
+        out: Destination for the summaries
+        fmt: 'csv' or 'jsonl'
+        progress: Optional stream for rows/sec progress, at most once a second
+
+    Returns:
+        dict: loans, patrons, total_late_fees, elapsed_seconds, rows_per_second
+    """
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f'Unknown output format: {fmt!r}')
+    as_of = as_of or datetime.now()
+    stats = {'loans': 0, 'patrons': 0, 'total_late_fees': 0.0}
+    start = time.perf_counter()
+
+    def counted(chunks):
+        last_report = start
+        for chunk in chunks:
+            stats['loans'] += len(chunk)
+            now = time.perf_counter()
+            if progress is not None and now - last_report >= 1.0:
+                progress.write(f"{stats['loans']} loans, {stats['loans'] / (now - start):.0f} rows/sec\n")
+                last_report = now
+            yield chunk
+
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+
+    chunks = counted(iter_overdue_loan_chunks(as_of, chunk_size))
+    for summary in iter_patron_summaries(iter_fee_chunks(chunks, as_of)):
+        stats['patrons'] += 1
+        stats['total_late_fees'] = round(stats['total_late_fees'] + summary['total_late_fees'], 2)
+        if fmt == 'csv':
+            writer.writerow(dict(summary, book_ids=' '.join(str(b) for b in summary['book_ids'])))
+        else:
+            out.write(json.dumps(summary) + '\n')
+
+    stats['elapsed_seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['loans'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] else 0.0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point for library-sweep."""
+    parser = argparse.ArgumentParser(prog='library-sweep', description='Summarize overdue loans per patron.')
+    parser.add_argument('--database', default=database.DATABASE, help='SQLite database file')
+    parser.add_argument('--as-of', type=datetime.fromisoformat, default=None,
+                        help='ISO timestamp to treat as now (default: current time)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='loans read per query')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    parser.add_argument('--output', default='-', help="output file, or '-' for stdout")
+    args = parser.parse_args(argv)
+
+    database.DATABASE = args.database
+    database.init_database()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        stats = run_sweep(args.as_of, args.chunk_size, out, args.format, progress=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Swept {stats['loans']} overdue loans for {stats['patrons']} patrons "
+          f"(${stats['total_late_fees']:.2f} in late fees) in {stats['elapsed_seconds']:.2f}s, "
+          f"{stats['rows_per_second']:.0f} rows/sec", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,10 @@ Pytest configuration and fixtures for the Library Management System tests.
 """
 
 import pytest
-from database import init_database, clear_test_data
+from database import init_database, clear_test_data, set_pragma_profile
+
+# Tests don't need fsync durability
+set_pragma_profile('test')
 
 
 @pytest.fixture(autouse=True)
@@ -1,6 +1,7 @@
 import pytest
+import threading
 from library_service import add_book_to_catalog, borrow_book_by_patron
-from database import get_book_by_isbn
+from database import get_book_by_isbn, get_book_by_id, get_patron_borrow_count
 
 # R3: Borrow Book
 def test_borrow_book_valid():
@@ -33,4 +34,34 @@ def test_borrow_book_unavailable():
 def test_borrow_book_nonexistent_book():
     success, message = borrow_book_by_patron("123456", 99999)
     assert success is False
-    assert "not found" in message.lower() or "invalid" in message.lower()
\ No newline at end of file
+    assert "not found" in message.lower() or "invalid" in message.lower()
+
+def test_borrow_book_concurrent_never_oversells():
+    add_book_to_catalog("Contended Book", "Author", "8888888888883", 3)
+    book_id = get_book_by_isbn("8888888888883")['id']
+    patrons = ["111111", "222222", "333333", "444444", "555555", "666666", "777777", "888888"]
+    results = []
+    barrier = threading.Barrier(len(patrons))
+
+    def borrow(patron_id):
+        barrier.wait()
+        results.append(borrow_book_by_patron(patron_id, book_id)[0])
+
+    threads = [threading.Thread(target=borrow, args=(p,)) for p in patrons]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 3
+    assert get_book_by_id(book_id)['available_copies'] == 0
+
+def test_borrow_book_limit_leaves_no_record():
+    add_book_to_catalog("Limit Book", "Author", "8888888888884", 10)
+    book_id = get_book_by_isbn("8888888888884")['id']
+    for _ in range(5):
+        assert borrow_book_by_patron("999999", book_id)[0] is True
+    success, message = borrow_book_by_patron("999999", book_id)
+    assert success is False
+    assert "limit" in message.lower()
+    assert get_patron_borrow_count("999999") == 5
+    assert get_book_by_id(book_id)['available_copies'] == 5
@@ -0,0 +1,102 @@
+import io
+import json
+import database
+from app import create_app
+from database import get_book_by_isbn
+from library_service import add_book_to_catalog
+from bulk_import import import_books, iter_records, main, parse_record
+
+CSV_BODY = (
+    "title,author,isbn,total_copies\n"
+    "Bulk One,Author A,9999999999001,2\n"
+    "Bulk Two,Author B,9999999999002,1\n"
+    "No Author,,9999999999003,1\n"
+    "Bulk One Again,Author A,9999999999001,4\n"
+    "Bad Copies,Author C,9999999999004,zero\n"
+)
+
+def _import(text, fmt='csv', batch_size=5000):
+    rejections = []
+    stats = import_books(iter_records(io.StringIO(text), fmt), batch_size, rejections.append)
+    return stats, rejections
+
+# Record parsing
+def test_parse_record_reuses_r1_rules():
+    book, error = parse_record({'title': ' T ', 'author': 'A', 'isbn': '9999999999001', 'total_copies': '3'})
+    assert book == ('T', 'A', '9999999999001', 3, 3)
+    assert error == ''
+    assert parse_record({'title': 'T', 'author': 'A', 'isbn': '123', 'total_copies': 1}) == \
+        (None, "ISBN must be exactly 13 digits.")
+    assert parse_record({'title': 'T', 'author': 'A', 'isbn': '9999999999001', 'total_copies': True}) == \
+        (None, "Total copies must be a positive integer.")
+    assert parse_record(None) == (None, 'Record is not a JSON object.')
+
+# Import
+def test_csv_import_inserts_valid_rows_and_reports_rejections():
+    stats, rejections = _import(CSV_BODY)
+    assert stats['rows'] == 5
+    assert stats['inserted'] == 2
+    assert stats['rejected'] == 3
+    assert stats['rows_per_second'] > 0
+    assert rejections == [
+        {'line': 4, 'isbn': '9999999999003', 'reason': 'Author is required.'},
+        {'line': 5, 'isbn': '9999999999001', 'reason': 'Duplicate ISBN in import.'},
+        {'line': 6, 'isbn': '9999999999004', 'reason': 'Total copies must be a positive integer.'},
+    ]
+    book = get_book_by_isbn("9999999999001")
+    assert book['title'] == "Bulk One"
+    assert book['available_copies'] == 2
+
+def test_import_skips_isbns_already_in_catalog_across_batches():
+    add_book_to_catalog("Existing", "Author", "9999999999005", 1)
+    lines = [json.dumps({'title': f'Bulk {i}', 'author': 'A', 'isbn': f'999999999900{i}', 'total_copies': 1})
+             for i in range(5, 10)]
+    stats, rejections = _import('\n'.join(lines) + '\n', fmt='jsonl', batch_size=2)
+    assert stats['inserted'] == 4
+    assert rejections == [{'line': 1, 'isbn': '9999999999005', 'reason': 'A book with this ISBN already exists.'}]
+    assert get_book_by_isbn("9999999999005")['title'] == "Existing"
+    assert get_book_by_isbn("9999999999009")['title'] == "Bulk 9"
+
+def test_jsonl_import_rejects_malformed_lines():
+    stats, rejections = _import('not json\n\n[1, 2]\n', fmt='jsonl')
+    assert stats['rows'] == 2
+    assert [r['line'] for r in rejections] == [1, 3]
+
+def test_cli_writes_rejection_report(tmp_path, capsys):
+    source = tmp_path / "books.csv"
+    source.write_text(CSV_BODY)
+    report = tmp_path / "rejects.csv"
+    assert main([str(source), '--rejects', str(report)]) == 1
+    assert report.read_text().splitlines()[0] == 'line,isbn,reason'
+    assert len(report.read_text().splitlines()) == 4
+    assert 'Imported 2 of 5 books (3 rejected)' in capsys.readouterr().err
+
+def test_cli_initializes_fresh_database(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(database, 'DATABASE', database.DATABASE)
+    source = tmp_path / "books.csv"
+    source.write_text(CSV_BODY)
+    fresh = tmp_path / "fresh.db"
+    try:
+        assert main([str(source), '--database', str(fresh), '--rejects', str(tmp_path / "rejects.csv")]) == 1
+        assert get_book_by_isbn("9999999999002")['title'] == "Bulk Two"
+    finally:
+        database.close_pool()
+    assert 'Imported 2 of 5 books' in capsys.readouterr().err
+
+# Bulk API
+def test_bulk_api_accepts_csv_and_ndjson():
+    client = create_app({'DATABASE_PROFILE': 'test'}).test_client()
+    response = client.post('/api/books/bulk', data=CSV_BODY, content_type='text/csv')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['inserted'] == 2
+    assert [r['line'] for r in data['rejections']] == [4, 5, 6]
+
+    body = json.dumps({'title': 'Bulk JSON', 'author': 'A', 'isbn': '9999999999006', 'total_copies': 1}) + '\n'
+    response = client.post('/api/books/bulk', data=body, content_type='application/x-ndjson')
+    assert response.get_json()['inserted'] == 1
+
+def test_bulk_api_rejects_unknown_content_type():
+    client = create_app({'DATABASE_PROFILE': 'test'}).test_client()
+    response = client.post('/api/books/bulk', data='{}', content_type='application/json')
+    assert response.status_code == 415
@@ -0,0 +1,40 @@
+import time
+import pytest
+from cache import LRUCache
+
+# Bounded LRU cache
+def test_lru_cache_hits_and_misses():
+    cache = LRUCache(max_entries=2)
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_ratio'] == 0.5
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.stats()['evictions'] == 1
+
+def test_lru_cache_ttl_expires_entries():
+    cache = LRUCache(max_entries=2, ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.stats()['expirations'] == 1
+
+def test_lru_cache_invalidate_and_clear():
+    cache = LRUCache(max_entries=4)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.invalidate('a')
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()['invalidations'] == 2
@@ -0,0 +1,51 @@
+import pytest
+from app import create_app
+from database import get_book_by_isbn
+from library_service import add_book_to_catalog, borrow_book_by_patron
+from routes.fragments import get_catalog_row_cache_stats, render_catalog_row
+
+@pytest.fixture
+def app():
+    return create_app({'DATABASE_PROFILE': 'test'})
+
+@pytest.fixture
+def books():
+    add_book_to_catalog("Fragment One", "Author", "7777777777772", 2)
+    add_book_to_catalog("<b>Fragment Two</b>", "Author", "7777777777773", 1)
+    return get_book_by_isbn("7777777777772"), get_book_by_isbn("7777777777773")
+
+def _misses():
+    return get_catalog_row_cache_stats()['misses']
+
+# Row fragments
+def test_unchanged_row_served_from_cache(app, books):
+    with app.test_request_context():
+        first = render_catalog_row(books[0])
+        misses = _misses()
+        assert render_catalog_row(get_book_by_isbn("7777777777772")) is first
+        assert _misses() == misses
+        assert "2/2 Available" in first
+
+def test_fragment_escapes_book_fields(app, books):
+    with app.test_request_context():
+        html = render_catalog_row(books[1])
+    assert "&lt;b&gt;Fragment Two&lt;/b&gt;" in html
+
+def test_borrow_rerenders_only_that_row(app, books):
+    one, two = books
+    with app.test_request_context():
+        render_catalog_row(one)
+        cached_two = render_catalog_row(two)
+        borrow_book_by_patron("222222", one.id)
+        misses = _misses()
+        html = render_catalog_row(get_book_by_isbn("7777777777772"))
+        assert "1/2 Available" in html
+        assert _misses() == misses + 1
+        assert render_catalog_row(get_book_by_isbn("7777777777773")) is cached_two
+        assert _misses() == misses + 1
+
+def test_catalog_page_assembled_from_fragments(app, books):
+    client = app.test_client()
+    html = client.get('/catalog?limit=200').get_data(as_text=True)
+    with app.test_request_context():
+        assert render_catalog_row(books[0]) in html
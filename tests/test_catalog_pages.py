@@ -0,0 +1,68 @@
+import pytest
+from app import create_app
+from database import get_book_by_isbn, get_pool_stats
+from library_service import (
+    add_book_to_catalog, decode_catalog_cursor, encode_catalog_cursor, get_catalog_page
+)
+
+@pytest.fixture
+def keyset_books():
+    # '~' sorts after letters, keeping these at the end of the catalog
+    for i in range(1, 6):
+        add_book_to_catalog(f"~Keyset {i}", "Author", f"123456789000{i + 1}", 1)
+    return [get_book_by_isbn(f"123456789000{i + 1}") for i in range(1, 6)]
+
+def _titles(page):
+    return [book.title for book in page['books']]
+
+# Keyset pages
+def test_catalog_pages_forward_in_title_order(keyset_books):
+    start = encode_catalog_cursor("~Keyset", 0)
+    page = get_catalog_page(2, after=start)
+    assert _titles(page) == ["~Keyset 1", "~Keyset 2"]
+    assert page['prev_cursor'] is not None
+    page = get_catalog_page(2, after=page['next_cursor'])
+    assert _titles(page) == ["~Keyset 3", "~Keyset 4"]
+    page = get_catalog_page(2, after=page['next_cursor'])
+    assert _titles(page) == ["~Keyset 5"]
+    assert page['next_cursor'] is None
+
+def test_catalog_page_back_from_cursor(keyset_books):
+    fourth = keyset_books[3]
+    page = get_catalog_page(2, before=encode_catalog_cursor(fourth.title, fourth.id))
+    assert _titles(page) == ["~Keyset 2", "~Keyset 3"]
+    assert decode_catalog_cursor(page['next_cursor']) == ("~Keyset 3", keyset_books[2].id)
+    assert decode_catalog_cursor(page['prev_cursor']) == ("~Keyset 2", keyset_books[1].id)
+
+def test_catalog_page_rejects_bad_cursor():
+    with pytest.raises(ValueError):
+        get_catalog_page(2, after="not-a-cursor")
+
+# Catalog view
+def test_catalog_view_streams_page_with_controls(keyset_books):
+    client = create_app({'DATABASE_PROFILE': 'test'}).test_client()
+    cursor = encode_catalog_cursor("~Keyset", 0)
+    response = client.get(f'/catalog?limit=2&after={cursor}')
+    assert response.status_code == 200
+    assert response.is_streamed
+    html = response.get_data(as_text=True)
+    assert "~Keyset 1" in html and "~Keyset 2" in html and "~Keyset 3" not in html
+    assert "Next Page" in html and "Previous Page" in html
+
+def test_catalog_view_releases_connection_while_streaming(keyset_books):
+    client = create_app({'DATABASE_PROFILE': 'test'}).test_client()
+    cursor = encode_catalog_cursor("~Keyset", 0)
+    response = client.get(f'/catalog?limit=2&after={cursor}')
+    body = b''
+    for chunk in response.response:
+        body += chunk if isinstance(chunk, bytes) else chunk.encode()
+        if b"~Keyset 1" in body:
+            break
+    stats = get_pool_stats()
+    assert stats['idle'] == stats['open']
+    response.close()
+
+def test_catalog_view_flashes_bad_cursor_once():
+    client = create_app({'DATABASE_PROFILE': 'test'}).test_client()
+    assert "Invalid cursor." in client.get('/catalog?after=bad').get_data(as_text=True)
+    assert "Invalid cursor." not in client.get('/catalog').get_data(as_text=True)
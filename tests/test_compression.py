@@ -0,0 +1,67 @@
+import gzip
+import json
+import zlib
+import pytest
+from app import create_app
+from library_service import add_book_to_catalog
+
+@pytest.fixture
+def client():
+    for i in range(10):
+        add_book_to_catalog(f"Compressible Book {i}", "Author", f"555555555555{i}", 1)
+    return create_app({'DATABASE_PROFILE': 'test'}).test_client()
+
+# Negotiation
+def test_gzip_preferred_for_large_json(client):
+    plain = client.get('/api/search?q=compressible&limit=10')
+    response = client.get('/api/search?q=compressible&limit=10', headers={'Accept-Encoding': 'deflate, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = gzip.decompress(response.data)
+    assert json.loads(body) == plain.get_json()
+    assert int(response.headers['Content-Length']) == len(response.data) < len(plain.data)
+
+def test_deflate_when_gzip_refused(client):
+    response = client.get('/api/search?q=compressible&limit=10',
+                          headers={'Accept-Encoding': 'gzip;q=0, deflate'})
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(response.data))['count'] == 10
+
+def test_identity_without_accept_encoding(client):
+    response = client.get('/api/search?q=compressible&limit=10')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+def test_small_bodies_not_compressed(client):
+    response = client.get('/api/search', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 400
+    assert 'Content-Encoding' not in response.headers
+
+def test_level_zero_disables_compression():
+    client = create_app({'DATABASE_PROFILE': 'test', 'COMPRESS_LEVEL': 0}).test_client()
+    response = client.get('/catalog', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+# Streaming
+def test_streamed_catalog_compressed_progressively(client):
+    plain = client.get('/catalog').get_data()
+    response = client.get('/catalog', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    # The first chunk is sync-flushed, so it decodes on its own
+    assert zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks[0])
+    assert gzip.decompress(b''.join(chunks)) == plain
+
+# ETags
+def test_compressed_etag_revalidates(client):
+    response = client.get('/api/search?q=compressible&limit=10', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    assert etag.endswith('-gzip"')
+    again = client.get('/api/search?q=compressible&limit=10',
+                       headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert 'Accept-Encoding' in again.headers['Vary']
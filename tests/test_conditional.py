@@ -0,0 +1,50 @@
+from unittest.mock import patch
+import pytest
+from app import create_app
+from library_service import add_book_to_catalog
+
+@pytest.fixture
+def client():
+    return create_app({'DATABASE_PROFILE': 'test'}).test_client()
+
+# ETag revalidation
+@pytest.mark.parametrize('url', ['/catalog', '/search?q=gatsby&type=title', '/api/search?q=gatsby'])
+def test_unchanged_catalog_answers_304(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/')
+    assert first.headers['Last-Modified']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    second = client.get(url, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert second.data == b''
+
+def test_304_runs_no_catalog_query(client):
+    etag = client.get('/catalog').headers['ETag']
+    with patch('routes.catalog_routes.get_catalog_page', side_effect=AssertionError('queried')):
+        assert client.get('/catalog', headers={'If-None-Match': etag}).status_code == 304
+
+def test_catalog_change_moves_etag(client):
+    etag = client.get('/catalog').headers['ETag']
+    add_book_to_catalog("Etag Book", "Author", "4444444444446", 1)
+    response = client.get('/catalog', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_etag_depends_on_query_arguments(client):
+    assert (client.get('/api/search?q=gatsby').headers['ETag']
+            != client.get('/api/search?q=orwell').headers['ETag'])
+    assert (client.get('/api/search?q=gatsby&type=title').headers['ETag']
+            == client.get('/api/search?type=title&q=gatsby').headers['ETag'])
+
+def test_errors_and_flashes_get_no_etag(client):
+    assert 'ETag' not in client.get('/api/search').headers
+    etag = client.get('/catalog').headers['ETag']
+    with client.session_transaction() as session:
+        session['_flashes'] = [('error', 'Pending message')]
+    response = client.get('/catalog', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Pending message' in response.get_data(as_text=True)
@@ -0,0 +1,54 @@
+import pytest
+import database
+from database import ConnectionPool, PoolTimeoutError, get_db_connection, get_pool_stats
+
+# Connection pool
+def test_pool_reuses_connections():
+    pool = ConnectionPool(database.DATABASE, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    pool.close_all()
+
+def test_close_returns_connection_to_pool():
+    before = get_pool_stats()
+    conn = get_db_connection()
+    conn.execute('SELECT 1').fetchone()
+    conn.close()
+    after = get_pool_stats()
+    assert after['idle'] >= 1
+    assert after['hits'] + after['misses'] == before['hits'] + before['misses'] + 1
+
+def test_pool_timeout_when_exhausted():
+    pool = ConnectionPool(database.DATABASE, max_size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['waits'] == 1
+    assert pool.stats()['timeouts'] == 1
+    pool.release(held)
+    pool.close_all()
+
+def test_uncommitted_work_rolled_back_on_release():
+    pool = ConnectionPool(database.DATABASE, max_size=1)
+    with pool.connection() as conn:
+        conn.execute('INSERT INTO books (title, author, isbn, total_copies, available_copies) '
+                     'VALUES ("Pool", "Author", "1111111111110", 1, 1)')
+    with pool.connection() as conn:
+        row = conn.execute('SELECT * FROM books WHERE isbn = "1111111111110"').fetchone()
+    assert row is None
+    pool.close_all()
+
+def test_pool_reset_after_fork():
+    pool = ConnectionPool(database.DATABASE, max_size=1)
+    with pool.connection() as parent_conn:
+        pass
+    pool._pid = -1  # Pretend the pool was created in a parent process
+    with pool.connection() as child_conn:
+        assert child_conn is not parent_conn
+    assert pool.stats()['open'] == 1
+    pool.close_all()
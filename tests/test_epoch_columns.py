@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import pytest
+from database import (
+    backfill_epoch_columns, count_epoch_backfill_pending, db_connection, get_book_by_isbn,
+    get_borrow_record, insert_borrow_record, update_borrow_record_return_date
+)
+from fee_engine import from_epoch_us, to_epoch_us
+from library_service import add_book_to_catalog, get_patron_status_report
+
+NOW = datetime(2030, 6, 1, 10, 30, 15, 250000)
+
+@pytest.fixture
+def book_id():
+    add_book_to_catalog("Epoch Book", "Author", "4444444444447", 5)
+    return get_book_by_isbn("4444444444447")['id']
+
+def epoch_row(patron_id):
+    with db_connection() as conn:
+        return conn.execute('''
+            SELECT borrow_us, due_us, return_us FROM borrow_records WHERE patron_id = ?
+        ''', (patron_id,)).fetchone()
+
+def insert_legacy_record(patron_id, book_id, borrow_date, due_date, return_date=None):
+    """Insert a row the way code predating the epoch columns did."""
+    with db_connection() as conn:
+        conn.execute('''
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat(),
+              return_date.isoformat() if return_date else None))
+        conn.commit()
+
+# Epoch timestamp columns
+def test_epoch_round_trip():
+    assert from_epoch_us(to_epoch_us(NOW)) == NOW
+
+def test_writes_fill_epoch_columns(book_id):
+    insert_borrow_record("111111", book_id, NOW, NOW + timedelta(days=14))
+    update_borrow_record_return_date("111111", book_id, NOW + timedelta(days=20))
+    row = epoch_row("111111")
+    assert row['borrow_us'] == to_epoch_us(NOW)
+    assert row['due_us'] == to_epoch_us(NOW + timedelta(days=14))
+    assert row['return_us'] == to_epoch_us(NOW + timedelta(days=20))
+    record = get_borrow_record("111111", book_id)
+    assert record['due_date'] == NOW + timedelta(days=14)
+    assert record['return_date'] == NOW + timedelta(days=20)
+
+def test_readers_fall_back_to_text_before_backfill(book_id):
+    now = datetime.now()
+    insert_legacy_record("222222", book_id, now - timedelta(days=30), now - timedelta(days=16),
+                         now - timedelta(days=13))
+    insert_legacy_record("222222", book_id, now - timedelta(days=2), now + timedelta(days=12))
+    assert epoch_row("222222")['due_us'] is None
+    record = get_borrow_record("222222", book_id)
+    assert record['due_date'].date() == (now + timedelta(days=12)).date()
+    report = get_patron_status_report("222222")
+    assert report['total_late_fees'] == 1.5
+    assert report['num_borrowed'] == 1
+
+def test_backfill_converts_in_batches(book_id):
+    for days in range(5):
+        insert_legacy_record("333333", book_id, NOW - timedelta(days=days), NOW + timedelta(days=14 - days),
+                             NOW + timedelta(days=1) if days % 2 else None)
+    assert count_epoch_backfill_pending() >= 5
+    batches = []
+    converted = backfill_epoch_columns(batch_size=2, progress=batches.append)
+    assert converted >= 5
+    assert batches == sorted(batches)
+    assert count_epoch_backfill_pending() == 0
+    with db_connection() as conn:
+        rows = conn.execute('''
+            SELECT borrow_date, due_date, return_date, borrow_us, due_us, return_us
+            FROM borrow_records WHERE patron_id = '333333'
+        ''').fetchall()
+    for row in rows:
+        assert row['borrow_us'] == to_epoch_us(datetime.fromisoformat(row['borrow_date']))
+        assert row['due_us'] == to_epoch_us(datetime.fromisoformat(row['due_date']))
+        if row['return_date'] is None:
+            assert row['return_us'] is None
+        else:
+            assert row['return_us'] == to_epoch_us(datetime.fromisoformat(row['return_date']))
+    assert backfill_epoch_columns() == 0
@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+import fee_engine
+from fee_engine import (
+    NOT_RETURNED, calculate_late_fees, days_overdue_between, late_fee_for_days, to_epoch_us
+)
+
+NOW = datetime(2025, 3, 15, 12, 0, 0)
+
+def random_loans(count, seed=3):
+    rng = random.Random(seed)
+    loans = []
+    for _ in range(count):
+        due = NOW - timedelta(days=rng.randint(-20, 60), seconds=rng.randint(0, 86399),
+                              microseconds=rng.randint(0, 999999))
+        returned = None
+        if rng.random() < 0.6:
+            returned = due + timedelta(days=rng.randint(-10, 40), seconds=rng.randint(0, 86399))
+        loans.append((due, returned))
+    return loans
+
+def scalar(loans):
+    days = [days_overdue_between(due, returned or NOW) for due, returned in loans]
+    return days, [late_fee_for_days(d) for d in days]
+
+# Batch late fee engine
+def test_late_fee_for_days_tiers():
+    assert late_fee_for_days(0) == 0.0
+    assert late_fee_for_days(3) == 1.5
+    assert late_fee_for_days(7) == 3.5
+    assert late_fee_for_days(10) == 6.5
+    assert late_fee_for_days(100) == 15.0
+
+def test_batch_python_matches_scalar():
+    loans = random_loans(2000)
+    due = [to_epoch_us(d) for d, _ in loans]
+    ret = [to_epoch_us(r) if r else NOT_RETURNED for _, r in loans]
+    assert calculate_late_fees(due, ret, now=NOW, use_numpy=False) == scalar(loans)
+
+def test_batch_numpy_matches_scalar():
+    np = pytest.importorskip('numpy')
+    loans = random_loans(2000)
+    due = np.array([to_epoch_us(d) for d, _ in loans], dtype=np.int64)
+    ret = np.array([to_epoch_us(r) if r else NOT_RETURNED for _, r in loans], dtype=np.int64)
+    days, fees = calculate_late_fees(due, ret, now=NOW, use_numpy=True)
+    expected_days, expected_fees = scalar(loans)
+    assert days.tolist() == expected_days
+    assert fees.tolist() == expected_fees
+
+def test_batch_accepts_none_for_unreturned():
+    due = [to_epoch_us(NOW - timedelta(days=9))]
+    days, fees = calculate_late_fees(due, [None], now=NOW, use_numpy=False)
+    assert days == [9] and fees == [5.5]
+    if fee_engine.np is not None:
+        days, fees = calculate_late_fees(due, [None], now=NOW, use_numpy=True)
+        assert days.tolist() == [9] and fees.tolist() == [5.5]
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+import database
+from database import (
+    db_connection, get_book_by_isbn, get_patron_ledger, insert_borrow_record,
+    rebuild_patron_ledger, update_borrow_record_return_date, verify_patron_ledger
+)
+from library_service import add_book_to_catalog, borrow_book_by_patron, return_book_by_patron
+from ledger import main
+
+@pytest.fixture
+def book_id():
+    add_book_to_catalog("Ledger Book", "Author", "3333333333331", 5)
+    return get_book_by_isbn("3333333333331")['id']
+
+# Patron ledger
+def test_ledger_follows_borrow_and_return(book_id):
+    borrow_book_by_patron("123456", book_id)
+    borrow_book_by_patron("123456", book_id)
+    ledger = get_patron_ledger("123456")
+    assert ledger['active_loans'] == 2
+    assert ledger['total_loans'] == 2
+    return_book_by_patron("123456", book_id)
+    ledger = get_patron_ledger("123456")
+    assert ledger['active_loans'] == 1
+    assert ledger['total_loans'] == 2
+    assert ledger['accrued_fees'] == 0.0
+    assert ledger['last_activity'] is not None
+
+def test_ledger_accrues_late_fees_on_return(book_id):
+    now = datetime.now()
+    insert_borrow_record("654321", book_id, now - timedelta(days=30), now - timedelta(days=16))
+    update_borrow_record_return_date("654321", book_id, now - timedelta(days=13))
+    ledger = get_patron_ledger("654321")
+    assert ledger['active_loans'] == 0
+    assert ledger['accrued_fees'] == 1.5
+    assert ledger['last_activity'] == (now - timedelta(days=13)).isoformat()
+
+def test_ledger_limit_check_uses_ledger():
+    add_book_to_catalog("Ledger Limit Book", "Author", "3333333333332", 6)
+    book_id = get_book_by_isbn("3333333333332")['id']
+    for _ in range(5):
+        assert borrow_book_by_patron("000000", book_id)[0] is True
+    success, message = borrow_book_by_patron("000000", book_id)
+    assert success is False
+    assert "maximum borrowing limit" in message.lower()
+
+def test_unknown_patron_has_zero_ledger():
+    ledger = get_patron_ledger("000000")
+    assert ledger['active_loans'] == 0
+    assert ledger['accrued_fees'] == 0.0
+
+def test_verify_detects_drift_and_rebuild_repairs_it(book_id):
+    borrow_book_by_patron("123456", book_id)
+    assert verify_patron_ledger() == []
+    with db_connection() as conn:
+        conn.execute("UPDATE patron_ledger SET active_loans = 4 WHERE patron_id = '123456'")
+        conn.commit()
+    mismatches = verify_patron_ledger()
+    assert {'patron_id': '123456', 'field': 'active_loans', 'expected': 1, 'actual': 4} in mismatches
+    assert main(['verify', '--database', database.DATABASE]) == 1
+    assert rebuild_patron_ledger() >= 1
+    assert verify_patron_ledger() == []
+    assert main(['verify', '--database', database.DATABASE]) == 0
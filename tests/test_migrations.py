@@ -0,0 +1,110 @@
+import multiprocessing
+import sqlite3
+import pytest
+import database
+from datetime import datetime
+from database import db_connection, get_patron_ledger, get_patron_loans_page, iter_overdue_loan_chunks
+from migrations import apply_migrations, discover_migrations, get_applied_versions, main
+
+@pytest.fixture
+def temp_database(tmp_path):
+    original = database.DATABASE
+    database.DATABASE = str(tmp_path / 'migrate.db')
+    yield database.DATABASE
+    database.close_pool()
+    database.DATABASE = original
+
+def create_legacy_database(path, loans):
+    """Build a database as the app created it before migrations existed."""
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                    author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL, total_copies INTEGER NOT NULL,
+                    available_copies INTEGER NOT NULL)''')
+    conn.execute('''CREATE TABLE borrow_records (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patron_id TEXT NOT NULL, book_id INTEGER NOT NULL, borrow_date TEXT NOT NULL,
+                    due_date TEXT NOT NULL, return_date TEXT)''')
+    conn.execute("INSERT INTO books VALUES (1, 'Legacy', 'Author', '1212121212121', 9, 9)")
+    conn.executemany('''INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+                        VALUES ('121212', 1, ?, ?)''',
+                     [(f'2030-01-{day:02d}T10:00:00', f'2030-01-{day + 14:02d}T10:00:00')
+                      for day in range(1, loans + 1)])
+    conn.commit()
+    conn.close()
+
+# Schema migrations
+def test_migrations_are_ordered_and_described():
+    migrations = discover_migrations()
+    versions = [m.version for m in migrations]
+    assert versions == sorted(versions) == list(range(1, len(versions) + 1))
+    assert all(m.description for m in migrations)
+
+def test_fresh_database_applies_every_migration_once(temp_database):
+    results = apply_migrations()
+    assert [r['status'] for r in results] == ['applied'] * len(discover_migrations())
+    applied = get_applied_versions()
+    assert sorted(applied) == [m.version for m in discover_migrations()]
+    assert all(row['elapsed_seconds'] >= 0 for row in applied.values())
+    assert apply_migrations() == []
+
+def test_dry_run_changes_nothing(temp_database):
+    create_legacy_database(temp_database, loans=3)
+    results = apply_migrations(dry_run=True)
+    assert {r['status'] for r in results} == {'pending'}
+    assert [r['rows'] for r in results if r['name'] == 'epoch_columns'] == [3]
+    assert get_applied_versions() == {}
+    with db_connection() as conn:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'patron_ledger'").fetchone() is None
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'schema_version'").fetchone() is None
+
+def test_legacy_database_is_adopted_with_batched_backfill(temp_database):
+    create_legacy_database(temp_database, loans=5)
+    results = apply_migrations(backfill=False)
+    assert results[-1]['status'] == 'deferred'
+    assert results[-1]['version'] not in get_applied_versions()
+    assert get_patron_ledger('121212')['active_loans'] == 5
+    results = apply_migrations(batch_size=2)
+    assert [(r['name'], r['status'], r['rows']) for r in results] == [
+        ('epoch_columns', 'applied', 5), ('epoch_indexes', 'applied', 0)]
+    with db_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM borrow_records WHERE due_us IS NULL').fetchone()[0] == 0
+
+def _start_worker(path):
+    """What each pre-forked worker does on startup: point at the database and initialize it."""
+    database.DATABASE = path
+    database.init_database()
+    return sorted(get_applied_versions())
+
+def test_concurrent_start_applies_each_migration_once(temp_database):
+    workers = 4
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        results = pool.map(_start_worker, [temp_database] * workers)
+    versions = [m.version for m in discover_migrations()]
+    assert results == [versions] * workers
+    with db_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM schema_version').fetchone()[0] == len(versions)
+
+def test_epoch_queries_wait_for_epoch_indexes(temp_database):
+    create_legacy_database(temp_database, loans=3)
+    apply_migrations(backfill=False)
+    as_of = datetime(2031, 1, 1)
+    # Deferred backfill: due_us is still NULL, so the text columns are used
+    assert sum(len(chunk) for chunk in iter_overdue_loan_chunks(as_of)) == 3
+    first = get_patron_loans_page('121212', 2)
+    assert first[-1]['page_key'] == '2030-01-02T10:00:00'
+    apply_migrations()
+    assert sum(len(chunk) for chunk in iter_overdue_loan_chunks(as_of)) == 3
+    # A text cursor issued before the migration keeps paging
+    rest = get_patron_loans_page('121212', 2, (first[-1]['page_key'], first[-1]['id']))
+    assert [row['borrow_date'] for row in rest] == ['2030-01-01T10:00:00']
+    assert isinstance(get_patron_loans_page('121212', 1)[0]['page_key'], int)
+
+def test_cli_dry_run_and_apply(temp_database, capsys):
+    create_legacy_database(temp_database, loans=2)
+    assert main(['--database', temp_database, '--dry-run']) == 0
+    out = capsys.readouterr().out
+    assert '0005 epoch_columns: pending' in out
+    assert '(2 rows to backfill)' in out
+    assert main(['--database', temp_database]) == 0
+    assert 'applied in' in capsys.readouterr().out
+    main(['--database', temp_database])
+    assert 'Database is up to date.' in capsys.readouterr().out
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from models import Book, BorrowRecord
+from database import get_book_by_isbn, get_borrow_record, get_patron_borrowed_books
+from library_service import add_book_to_catalog, borrow_book_by_patron
+
+BOOK = Book(1, 'The Great Gatsby', 'F. Scott Fitzgerald', '9780743273565', 3, 2)
+
+# Row types
+def test_book_reads_like_a_dict():
+    assert BOOK['title'] == BOOK.title == 'The Great Gatsby'
+    assert BOOK.get('missing') is None
+    assert 'isbn' in BOOK
+    assert dict(BOOK) == BOOK.to_dict() == {
+        'id': 1, 'title': 'The Great Gatsby', 'author': 'F. Scott Fitzgerald',
+        'isbn': '9780743273565', 'total_copies': 3, 'available_copies': 2
+    }
+    assert BOOK == dict(BOOK)
+    assert not hasattr(BOOK, '__dict__')
+    with pytest.raises(KeyError):
+        BOOK['missing']
+    with pytest.raises(TypeError):
+        BOOK['title'] = 'Changed'
+
+def test_borrow_record_parses_dates_lazily():
+    due = datetime(2025, 1, 15, 9, 30)
+    record = BorrowRecord(7, '123456', 1, '2025-01-01T09:30:00', due.isoformat(), None)
+    assert record._due_date == due.isoformat()
+    assert record['due_date'] == due
+    assert record._due_date == due
+    assert record.return_date is None
+    assert record.is_overdue is True
+
+def test_borrow_record_eager_mode_parses_up_front():
+    record = BorrowRecord(7, '123456', 1, '2025-01-01T09:30:00', '2025-01-15T09:30:00',
+                          '2025-01-10T00:00:00', lazy=False)
+    assert record._return_date == datetime(2025, 1, 10)
+    assert record.is_overdue is False
+
+def test_database_helpers_return_row_types():
+    add_book_to_catalog("Row Type Book", "Author", "2222222222225", 2)
+    book = get_book_by_isbn("2222222222225")
+    assert isinstance(book, Book)
+    borrow_book_by_patron("123456", book.id)
+    record = get_borrow_record("123456", book.id)
+    assert isinstance(record, BorrowRecord)
+    assert record['due_date'] - record['borrow_date'] == timedelta(days=14)
+    [loan] = get_patron_borrowed_books("123456")
+    assert loan['title'] == "Row Type Book"
+    assert loan['is_overdue'] is False
+    assert json.loads(json.dumps(book.to_dict()))['isbn'] == "2222222222225"
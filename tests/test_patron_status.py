@@ -1,6 +1,14 @@
+import sqlite3
 import pytest
-from library_service import add_book_to_catalog, borrow_book_by_patron, get_patron_status_report
-from database import get_book_by_isbn
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from library_service import (
+    add_book_to_catalog, borrow_book_by_patron, get_patron_status_report,
+    get_patron_history_page, get_patron_history_summary, iter_patron_history,
+    get_patron_report_cache_stats, return_book_by_patron
+)
+import database
+from database import get_book_by_isbn, insert_borrow_record, update_borrow_record_return_date
 
 # R7: Patron Status Report
 def test_patron_status_report():
@@ -38,4 +46,111 @@ def test_patron_status_invalid_patron():
     assert 'currently_borrowed' in report
     assert 'num_borrowed' in report
     assert 'total_late_fees' in report
-    assert 'borrowing_history' in report
\ No newline at end of file
+    assert 'borrowing_history' in report
+
+def test_patron_status_single_pass_totals():
+    add_book_to_catalog("Overdue Book", "Author", "5555555555551", 3)
+    add_book_to_catalog("Returned Late Book", "Author", "5555555555552", 1)
+    overdue_id = get_book_by_isbn("5555555555551")['id']
+    returned_id = get_book_by_isbn("5555555555552")['id']
+    now = datetime.now()
+    # Out and 10 days overdue: $6.50; returned 3 days late: $1.50
+    insert_borrow_record("555555", overdue_id, now - timedelta(days=24), now - timedelta(days=10, hours=1))
+    insert_borrow_record("555555", returned_id, now - timedelta(days=40), now - timedelta(days=26))
+    update_borrow_record_return_date("555555", returned_id, now - timedelta(days=23))
+    borrow_book_by_patron("555555", overdue_id)
+    report = get_patron_status_report("555555")
+    assert report['num_borrowed'] == 2
+    assert [b['book_id'] for b in report['currently_borrowed']] == [overdue_id, overdue_id]
+    assert report['currently_borrowed'][0]['is_overdue'] is True
+    assert report['currently_borrowed'][1]['is_overdue'] is False
+    assert len(report['borrowing_history']) == 3
+    assert [h['late_fee'] for h in report['borrowing_history']] == [0.0, 6.5, 1.5]
+    assert report['total_late_fees'] == 8.0
+
+def test_patron_history_pages_match_report():
+    add_book_to_catalog("History Book", "Author", "5555555555553", 5)
+    book_id = get_book_by_isbn("5555555555553")['id']
+    now = datetime.now()
+    for days in (30, 20, 20, 10, 1):
+        insert_borrow_record("666666", book_id, now - timedelta(days=days), now - timedelta(days=days - 14))
+    report = get_patron_status_report("666666")
+    pages = []
+    cursor = None
+    while True:
+        page = get_patron_history_page("666666", limit=2, cursor=cursor)
+        pages.append(page['history'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [h for p in pages for h in p] == report['borrowing_history']
+    assert list(iter_patron_history("666666", page_size=3)) == report['borrowing_history']
+
+def test_patron_history_summary_matches_report():
+    add_book_to_catalog("Summary Book", "Author", "5555555555554", 2)
+    book_id = get_book_by_isbn("5555555555554")['id']
+    now = datetime.now()
+    insert_borrow_record("777777", book_id, now - timedelta(days=30), now - timedelta(days=16))
+    borrow_book_by_patron("777777", book_id)
+    report = get_patron_status_report("777777")
+    summary = get_patron_history_summary("777777")
+    assert summary['num_borrowed'] == report['num_borrowed'] == 2
+    assert summary['num_overdue'] == 1
+    assert summary['total_loans'] == len(report['borrowing_history'])
+    assert summary['total_late_fees'] == report['total_late_fees'] == 12.5
+
+def test_patron_history_rejects_bad_cursor():
+    with pytest.raises(ValueError):
+        get_patron_history_page("666666", cursor="not-a-cursor")
+
+# Patron status report cache
+def test_patron_report_cache_hits_until_loans_change():
+    add_book_to_catalog("Cached Report Book", "Author", "5555555555558", 3)
+    book_id = get_book_by_isbn("5555555555558")['id']
+    borrow_book_by_patron("888888", book_id)
+    first = get_patron_status_report("888888")
+    hits = get_patron_report_cache_stats()['hits']
+    assert get_patron_status_report("888888") == first
+    assert get_patron_report_cache_stats()['hits'] == hits + 1
+    insert_borrow_record("888888", book_id, datetime.now(), datetime.now() + timedelta(days=14))
+    assert get_patron_status_report("888888")['num_borrowed'] == 2
+    return_book_by_patron("888888", book_id)
+    assert get_patron_status_report("888888")['num_borrowed'] == 1
+    update_borrow_record_return_date("888888", book_id, datetime.now())
+    assert get_patron_status_report("888888")['num_borrowed'] == 0
+
+def test_patron_report_sees_borrow_from_another_connection():
+    add_book_to_catalog("Other Worker Book", "Author", "7777777777774", 2)
+    book_id = get_book_by_isbn("7777777777774")['id']
+    borrow_book_by_patron("777777", book_id)
+    assert get_patron_status_report("777777")['num_borrowed'] == 1
+    # Another worker borrows the second copy through its own connection
+    conn = sqlite3.connect(database.DATABASE)
+    borrow_date = datetime.now()
+    conn.execute('''
+        INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+        VALUES (?, ?, ?, ?)
+    ''', ("777777", book_id, borrow_date.isoformat(), (borrow_date + timedelta(days=14)).isoformat()))
+    database._ledger_record_borrow(conn, "777777", borrow_date.isoformat())
+    conn.commit()
+    conn.close()
+    assert get_patron_status_report("777777")['num_borrowed'] == 2
+
+class _Later(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=20)
+
+def test_cached_patron_report_reprices_open_loans():
+    add_book_to_catalog("Aging Loan Book", "Author", "5555555555559", 1)
+    book_id = get_book_by_isbn("5555555555559")['id']
+    borrow_book_by_patron("999999", book_id)
+    assert get_patron_status_report("999999")['total_late_fees'] == 0.0
+    with patch('library_service.datetime', _Later):
+        report = get_patron_status_report("999999")
+    # Due in 14 days, read 20 days on: 6 days at $0.50
+    assert report['total_late_fees'] == 3.0
+    assert report['borrowing_history'][0]['days_overdue'] == 6
+    assert report['currently_borrowed'][0]['is_overdue'] is True
+    assert get_patron_status_report("999999")['total_late_fees'] == 0.0
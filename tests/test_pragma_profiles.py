@@ -0,0 +1,43 @@
+import pytest
+import database
+from app import create_app
+from database import db_connection, set_pragma_profile, get_pool
+
+# PRAGMA profiles
+def test_connections_use_selected_profile():
+    with db_connection() as conn:
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 0  # OFF
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+def test_durable_profile_enables_wal():
+    try:
+        set_pragma_profile('durable')
+        with db_connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('PRAGMA synchronous').fetchone()[0] == 2  # FULL
+    finally:
+        set_pragma_profile('test')
+
+def test_test_profile_keeps_wal_journal():
+    try:
+        set_pragma_profile('durable')
+        with db_connection() as conn:
+            conn.execute('SELECT 1').fetchone()
+    finally:
+        set_pragma_profile('test')
+    with db_connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        set_pragma_profile('fastest')
+    assert database.PRAGMA_PROFILE == 'test'
+
+def test_create_app_selects_profile():
+    try:
+        create_app({'DATABASE_PROFILE': 'throughput'})
+        assert get_pool().profile == 'throughput'
+        with db_connection() as conn:
+            assert conn.execute('PRAGMA temp_store').fetchone()[0] == 2  # MEMORY
+    finally:
+        set_pragma_profile('test')
@@ -0,0 +1,77 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+import database
+from database import (
+    get_all_books, get_patron_borrow_count, get_patron_borrowed_books,
+    get_borrow_record, update_borrow_record_return_date, get_patron_loans_page,
+    get_catalog_books, iter_overdue_loan_chunks
+)
+
+def query_plans(fn, *args):
+    """Run a database helper and return the EXPLAIN QUERY PLAN of every statement it issued."""
+    statements = []
+    conn = sqlite3.connect(database.DATABASE)
+    conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(statements.append)
+
+    @contextmanager
+    def traced_connection():
+        yield conn
+
+    with patch('database.db_connection', traced_connection):
+        fn(*args)
+    conn.set_trace_callback(None)
+    plans = []
+    for sql in statements:
+        if sql.lstrip().upper().startswith(('SELECT', 'UPDATE')):
+            rows = conn.execute('EXPLAIN QUERY PLAN ' + sql).fetchall()
+            plans.append(' | '.join(row['detail'] for row in rows))
+    conn.rollback()
+    conn.close()
+    return plans
+
+# Index usage on hot queries
+def test_borrow_count_reads_patron_ledger():
+    plans = query_plans(get_patron_borrow_count, "111111")
+    assert plans
+    assert all('SCAN' not in plan for plan in plans)
+    assert any('patron_ledger' in plan for plan in plans)
+
+def test_borrowed_books_avoids_full_scan():
+    plans = query_plans(get_patron_borrowed_books, "111111")
+    assert plans
+    assert all('SCAN br' not in plan and 'SCAN borrow_records' not in plan for plan in plans)
+
+def test_borrow_record_uses_composite_index_without_sort():
+    plans = query_plans(get_borrow_record, "111111", 1)
+    assert any('idx_borrow_records_patron_book_borrow_us' in plan for plan in plans)
+    assert all('TEMP B-TREE' not in plan for plan in plans)
+
+def test_return_date_update_uses_index():
+    plans = query_plans(update_borrow_record_return_date, "111111", 1, datetime.now())
+    assert plans
+    assert all('SCAN borrow_records' not in plan for plan in plans)
+
+def test_history_page_uses_patron_date_index_without_sort():
+    plans = query_plans(get_patron_loans_page, "111111", 50, (1735689600000000, 10))
+    assert any('idx_borrow_records_patron_borrow_us' in plan for plan in plans)
+    assert all('TEMP B-TREE' not in plan for plan in plans)
+
+def test_overdue_sweep_filters_due_us_in_partial_index():
+    plans = query_plans(lambda: next(iter_overdue_loan_chunks(datetime.now()), None))
+    assert any('idx_borrow_records_active_due' in plan for plan in plans)
+    assert all('TEMP B-TREE' not in plan for plan in plans)
+
+def test_catalog_order_uses_nocase_index():
+    plans = query_plans(get_all_books)
+    assert any('idx_books_title_nocase' in plan for plan in plans)
+    assert all('TEMP B-TREE' not in plan for plan in plans)
+
+@pytest.mark.parametrize('direction', ['after', 'before'])
+def test_catalog_page_seeks_nocase_index(direction):
+    plans = query_plans(lambda: get_catalog_books(50, **{direction: ("Middle", 10)}))
+    assert any('SEARCH books USING INDEX idx_books_title_nocase' in plan for plan in plans)
+    assert all('TEMP B-TREE' not in plan for plan in plans)
@@ -1,6 +1,6 @@
 import pytest
 from library_service import return_book_by_patron, add_book_to_catalog, borrow_book_by_patron
-from database import get_book_by_isbn
+from database import get_book_by_isbn, get_book_by_id
 
 # R4: Return Book
 def test_return_book_not_borrowed():
@@ -37,3 +37,13 @@ def test_return_book_already_returned():
     success, message = return_book_by_patron("222222", book_id)  # Second return
     assert success is False
     assert "no active borrow record" in message.lower() or "not found" in message.lower()
+
+
+def test_return_book_restores_availability():
+    add_book_to_catalog("Restock Book", "Author", "7777777777780", 2)
+    book_id = get_book_by_isbn("7777777777780")['id']
+    borrow_book_by_patron("333333", book_id)
+    assert get_book_by_id(book_id)['available_copies'] == 1
+    success, _ = return_book_by_patron("333333", book_id)
+    assert success is True
+    assert get_book_by_id(book_id)['available_copies'] == 2
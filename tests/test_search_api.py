@@ -0,0 +1,111 @@
+import json
+import threading
+import pytest
+from app import create_app
+from database import get_book_by_isbn
+from search_index import PrefixIndex, reset_prefix_index, reset_fuzzy_index
+from library_service import add_book_to_catalog, borrow_book_by_patron
+
+BOOKS = [
+    {'id': 1, 'title': 'The Great Gatsby', 'author': 'F. Scott Fitzgerald'},
+    {'id': 2, 'title': 'the great gatsby', 'author': 'F. Scott Fitzgerald'},
+    {'id': 3, 'title': 'The Grapes of Wrath', 'author': 'John Steinbeck'},
+    {'id': 4, 'title': 'Tender Is the Night', 'author': 'F. Scott Fitzgerald'},
+]
+
+@pytest.fixture
+def client():
+    app = create_app({'DATABASE_PROFILE': 'test'})
+    reset_prefix_index()
+    reset_fuzzy_index()
+    yield app.test_client()
+    reset_prefix_index()
+    reset_fuzzy_index()
+
+# Autocomplete
+def test_prefix_index_completes_in_order():
+    index = PrefixIndex()
+    index.build(BOOKS)
+    assert index.complete('the gr', 'title') == ['The Grapes of Wrath', 'The Great Gatsby']
+    assert index.complete('THE', 'title', limit=1) == ['The Grapes of Wrath']
+    assert index.complete('f. s', 'author') == ['F. Scott Fitzgerald']
+    assert index.complete('zz', 'title') == []
+
+def test_prefix_index_add_patches_sorted_arrays():
+    index = PrefixIndex()
+    index.build(BOOKS)
+    index.add({'id': 5, 'title': 'The Gray Man', 'author': 'Mark Greaney'})
+    assert index.complete('the gr', 'title') == ['The Grapes of Wrath', 'The Gray Man', 'The Great Gatsby']
+
+def test_prefix_index_complete_waits_for_add():
+    index = PrefixIndex()
+    index.build(BOOKS)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(index.complete('the gr', 'title')))
+    # Hold the lock add() takes: complete() must not read the lists meanwhile
+    with index._lock:
+        reader.start()
+        reader.join(0.05)
+        assert reader.is_alive()
+    reader.join()
+    assert results == [['The Grapes of Wrath', 'The Great Gatsby']]
+
+def test_autocomplete_endpoint(client):
+    add_book_to_catalog("Autocomplete Aardvark", "Author", "4444444444441", 1)
+    response = client.get('/api/autocomplete?q=autocomplete a&type=title')
+    assert response.status_code == 200
+    assert response.get_json()['completions'] == ["Autocomplete Aardvark"]
+
+def test_autocomplete_endpoint_validation(client):
+    assert client.get('/api/autocomplete?q=&type=title').status_code == 400
+    assert client.get('/api/autocomplete?q=ab&type=isbn').status_code == 400
+    assert client.get('/api/autocomplete?q=ab&limit=x').status_code == 400
+
+def test_fuzzy_search_routes(client):
+    add_book_to_catalog("Fuzzy Route Book", "Bartholomew Pennyworth", "4444444444442", 1)
+    response = client.get('/api/search?q=Penyworth&type=fuzzy')
+    assert response.status_code == 200
+    assert [b['isbn'] for b in response.get_json()['results']] == ["4444444444442"]
+    page = client.get('/search?q=Penyworth&type=fuzzy')
+    assert b'Fuzzy Route Book' in page.data
+
+def test_search_api_limit_and_cursor(client):
+    for i in range(3):
+        add_book_to_catalog(f"Api Paged Ibis {i}", "Author", f"222222222222{i}", 1)
+    first = client.get('/api/search?q=api paged ibis&limit=2').get_json()
+    assert [b['isbn'] for b in first['results']] == ["2222222222220", "2222222222221"]
+    assert first['next_cursor']
+    second = client.get(f"/api/search?q=api paged ibis&limit=2&cursor={first['next_cursor']}").get_json()
+    assert [b['isbn'] for b in second['results']] == ["2222222222222"]
+    assert second['next_cursor'] is None
+    assert client.get('/api/search?q=ibis&cursor=bogus').status_code == 400
+
+# Patron history
+def test_patron_history_endpoint_pages(client):
+    add_book_to_catalog("Endpoint History", "Author", "8888888888881", 3)
+    book_id = get_book_by_isbn("8888888888881")['id']
+    for _ in range(3):
+        borrow_book_by_patron("888888", book_id)
+    response = client.get('/api/patron/888888/history?limit=2')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['count'] == 2
+    assert data['summary']['total_loans'] == 3
+    response = client.get('/api/patron/888888/history?limit=2&cursor=' + data['next_cursor'])
+    data = response.get_json()
+    assert data['count'] == 1
+    assert data['next_cursor'] is None
+
+def test_patron_history_endpoint_rejects_bad_input(client):
+    assert client.get('/api/patron/abc/history').status_code == 400
+    assert client.get('/api/patron/888888/history?cursor=bogus').status_code == 400
+
+def test_patron_history_export_streams_ndjson(client):
+    add_book_to_catalog("Export History", "Author", "8888888888882", 2)
+    book_id = get_book_by_isbn("8888888888882")['id']
+    borrow_book_by_patron("999999", book_id)
+    response = client.get('/api/patron/999999/history.ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert any(entry['book_id'] == book_id for entry in lines)
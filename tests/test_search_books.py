@@ -1,5 +1,11 @@
+from unittest.mock import patch
 import pytest
-from library_service import add_book_to_catalog, search_books_in_catalog
+import library_service
+from library_service import (
+    add_book_to_catalog, borrow_book_by_patron, search_books_in_catalog, search_books_page,
+    get_search_cache_stats
+)
+from database import db_connection, get_book_by_isbn
 
 # R6: Search Books
 def test_search_books_by_title():
@@ -19,4 +25,80 @@ def test_search_books_by_isbn():
 
 def test_search_books_no_results():
     results = search_books_in_catalog("NonExistentBook", "title")
-    assert len(results) == 0
\ No newline at end of file
+    assert len(results) == 0
+
+def test_search_books_partial_case_insensitive():
+    add_book_to_catalog("The Midnight Gardener", "Author", "6666666666661", 1)
+    results = search_books_in_catalog("NIGHT GARD", "title")
+    assert [b['isbn'] for b in results] == ["6666666666661"]
+
+def test_search_books_short_term():
+    add_book_to_catalog("Qz Book", "Author", "6666666666662", 1)
+    results = search_books_in_catalog("qz", "title")
+    assert any(b['isbn'] == "6666666666662" for b in results)
+
+def test_search_books_index_follows_title_updates():
+    add_book_to_catalog("Original Zebra Title", "Author", "6666666666663", 1)
+    with db_connection() as conn:
+        conn.execute('UPDATE books SET title = "Renamed Okapi Title" WHERE isbn = "6666666666663"')
+        conn.commit()
+    assert search_books_in_catalog("Zebra", "title") == []
+    assert [b['isbn'] for b in search_books_in_catalog("Okapi", "title")] == ["6666666666663"]
+
+def test_search_books_quotes_in_term():
+    add_book_to_catalog('The "Quoted" Book', "Author", "6666666666664", 1)
+    results = search_books_in_catalog('"Quoted"', "title")
+    assert [b['isbn'] for b in results] == ["6666666666664"]
+
+def test_search_books_ranked_exact_prefix_substring():
+    add_book_to_catalog("The Lantern", "Author", "6666666666665", 1)
+    add_book_to_catalog("Lantern", "Author", "6666666666666", 1)
+    add_book_to_catalog("Lanterns of Autumn", "Author", "6666666666669", 1)
+    add_book_to_catalog("Lantern Bay", "Author", "6666666666660", 1)
+    results = search_books_in_catalog("lantern", "title")
+    assert [b['title'] for b in results] == ["Lantern", "Lantern Bay", "Lanterns of Autumn", "The Lantern"]
+
+def test_search_books_page_walks_cursor():
+    for i in range(5):
+        add_book_to_catalog(f"Paged Heron {i}", "Author", f"555555555555{i}", 1)
+    seen = []
+    cursor = None
+    while True:
+        page = search_books_page("paged heron", "title", limit=2, cursor=cursor)
+        seen.extend(b['title'] for b in page['results'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [f"Paged Heron {i}" for i in range(5)]
+
+def test_search_books_page_rejects_bad_cursor():
+    with pytest.raises(ValueError):
+        search_books_page("anything", "title", cursor="not-a-cursor")
+
+def test_search_cache_invalidated_by_catalog_changes():
+    add_book_to_catalog("Cached Pelican", "Author", "5555555555550", 2)
+    before = get_search_cache_stats()
+    first = search_books_page("cached pelican", "title")
+    second = search_books_page("CACHED PELICAN ", "title")
+    assert second is first
+    assert get_search_cache_stats()['hits'] == before['hits'] + 1
+    book = get_book_by_isbn("5555555555550")
+    borrow_book_by_patron("555555", book['id'])
+    third = search_books_page("cached pelican", "title")
+    assert third is not first
+    assert third['results'][0]['available_copies'] == 1
+
+def test_search_page_racing_a_write_is_not_served():
+    add_book_to_catalog("Racing Pelican", "Author", "5555555555551", 2)
+    book = get_book_by_isbn("5555555555551")
+    real_matches = library_service._iter_search_matches
+
+    def matches_then_borrow(term, search_type):
+        matches = list(real_matches(term, search_type))
+        borrow_book_by_patron("555555", book['id'])
+        return iter(matches)
+
+    with patch('library_service._iter_search_matches', matches_then_borrow):
+        stale = search_books_page("racing pelican", "title")
+    assert stale['results'][0]['available_copies'] == 2
+    assert search_books_page("racing pelican", "title")['results'][0]['available_copies'] == 1
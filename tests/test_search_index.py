@@ -0,0 +1,98 @@
+from unittest.mock import patch
+import pytest
+import search_index
+from search_index import (
+    NgramIndex, FuzzyIndex, enable_ngram_index, disable_ngram_index, get_ngram_index,
+    get_prefix_index, reset_fuzzy_index, reset_prefix_index
+)
+from library_service import add_book_to_catalog, search_books_in_catalog
+
+BOOKS = [
+    {'id': 1, 'title': 'The Great Gatsby', 'author': 'F. Scott Fitzgerald'},
+    {'id': 2, 'title': 'Great Expectations', 'author': 'Charles Dickens'},
+    {'id': 5, 'title': '1984', 'author': 'George Orwell'},
+]
+
+# In-process n-gram index
+def test_ngram_index_substring_match():
+    index = NgramIndex()
+    index.build(BOOKS)
+    assert sorted(index.search('GREAT', 'title')) == [1, 2]
+    assert index.search('atsb', 'title') == [1]
+    assert index.search('orwell', 'author') == [5]
+
+def test_ngram_index_verifies_candidates():
+    index = NgramIndex()
+    index.build(BOOKS)
+    # Every trigram of "greatsby" occurs in "the great gatsby", but the term does not
+    assert index.search('greatsby', 'title') == []
+    assert index.search('great gats', 'title') == [1]
+
+def test_ngram_index_short_terms_and_stats():
+    index = NgramIndex()
+    index.build(BOOKS)
+    assert index.search('84', 'title') == [5]
+    assert index.search('', 'title') == [1, 2, 5]
+    stats = index.stats()
+    assert stats['books'] == 3
+    assert stats['posting_bytes'] == stats['postings'] * 4
+    assert stats['build_seconds'] >= 0
+
+def test_ngram_backend_updates_on_insert():
+    try:
+        enable_ngram_index()
+        assert get_ngram_index() is not None
+        add_book_to_catalog("Ngram Wombat Stories", "Author", "3333333333331", 1)
+        results = search_books_in_catalog("wombat st", "title")
+        assert [b['isbn'] for b in results] == ["3333333333331"]
+    finally:
+        disable_ngram_index()
+    assert get_ngram_index() is None
+
+def _build_racing_an_insert(title, isbn):
+    """Patch the catalog read so a book is inserted after it, while the index builds."""
+    real_get_all_books = search_index.get_all_books
+
+    def read_then_insert():
+        books = real_get_all_books()
+        add_book_to_catalog(title, "Author", isbn, 1)
+        return books
+    return patch('search_index.get_all_books', read_then_insert)
+
+def test_ngram_index_keeps_insert_made_during_build():
+    try:
+        with _build_racing_an_insert("Ngram Racing Capybara", "3333333333334"):
+            index = enable_ngram_index()
+        assert len(index.search('racing capybara', 'title')) == 1
+    finally:
+        disable_ngram_index()
+
+def test_shared_index_keeps_insert_made_during_build():
+    reset_prefix_index()
+    try:
+        with _build_racing_an_insert("Prefix Racing Quokka", "3333333333334"):
+            index = get_prefix_index()
+        assert index.complete('prefix racing q', 'title') == ["Prefix Racing Quokka"]
+    finally:
+        reset_prefix_index()
+
+def test_fuzzy_index_tolerates_typos():
+    index = FuzzyIndex()
+    index.build(BOOKS)
+    assert index.search('Orwel') == [(5, 1)]
+    assert index.search('Fitzgerld') == [(1, 1)]
+    assert index.search('great expectatons') == [(2, 1)]
+    assert index.search('gr8') == []
+
+def test_fuzzy_index_ranks_by_distance():
+    index = FuzzyIndex()
+    index.build(BOOKS + [{'id': 7, 'title': 'Grest Walls', 'author': 'Someone'}])
+    assert index.search('great') == [(1, 0), (2, 0), (7, 1)]
+
+def test_fuzzy_search_mode():
+    reset_fuzzy_index()
+    add_book_to_catalog("Fuzzy Marmalade Skies", "Ottoline Quackenbush", "3333333333332", 1)
+    results = search_books_in_catalog("Quakenbush", "fuzzy")
+    assert [b['isbn'] for b in results] == ["3333333333332"]
+    assert results[0]['match_distance'] == 1
+    reset_fuzzy_index()
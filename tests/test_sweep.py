@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+import sqlite3
+import pytest
+from database import insert_book, get_book_by_isbn, insert_borrow_record
+from sweep import run_sweep, main
+
+AS_OF = datetime(2030, 1, 1, 12, 0, 0)
+
+def add_loan(patron_id, book_id, days_overdue):
+    due = AS_OF - timedelta(days=days_overdue, hours=1)
+    insert_borrow_record(patron_id, book_id, due - timedelta(days=14), due)
+
+@pytest.fixture
+def overdue_loans():
+    insert_book("Sweep Book", "Author", "7777777777771", 10, 10)
+    book_id = get_book_by_isbn("7777777777771")['id']
+    add_loan("777777", book_id, 3)
+    add_loan("777777", book_id, 10)
+    add_loan("888888", book_id, 40)
+    # Not yet due at AS_OF
+    insert_borrow_record("888888", book_id, AS_OF, AS_OF + timedelta(days=14))
+    return book_id
+
+def summaries_for_test_patrons(rows):
+    return {row['patron_id']: row for row in rows if row['patron_id'] in ("777777", "888888")}
+
+# Overdue sweep
+def test_sweep_summarizes_per_patron(overdue_loans):
+    out = io.StringIO()
+    stats = run_sweep(AS_OF, chunk_size=1, out=out, fmt='jsonl')
+    rows = summaries_for_test_patrons(json.loads(line) for line in out.getvalue().splitlines())
+    assert rows["777777"]['overdue_loans'] == 2
+    assert rows["777777"]['total_late_fees'] == 1.5 + 6.5
+    assert rows["777777"]['max_days_overdue'] == 10
+    assert rows["888888"]['overdue_loans'] == 1
+    assert rows["888888"]['total_late_fees'] == 15.0
+    assert stats['loans'] >= 3
+    assert stats['rows_per_second'] > 0
+
+def test_sweep_csv_output(overdue_loans):
+    out = io.StringIO()
+    run_sweep(AS_OF, chunk_size=2, out=out, fmt='csv')
+    rows = summaries_for_test_patrons(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows["888888"]['max_days_overdue'] == '40'
+    assert rows["777777"]['book_ids'] == f"{overdue_loans} {overdue_loans}"
+
+def test_sweep_cli(overdue_loans, tmp_path, capsys):
+    import database
+    output = tmp_path / 'overdue.jsonl'
+    assert main(['--database', database.DATABASE, '--as-of', AS_OF.isoformat(),
+                 '--format', 'jsonl', '--output', str(output)]) == 0
+    rows = summaries_for_test_patrons(json.loads(line) for line in output.read_text().splitlines())
+    assert set(rows) == {"777777", "888888"}
+    assert 'rows/sec' in capsys.readouterr().err
+
+def test_sweep_cli_upgrades_legacy_database(tmp_path, monkeypatch, capsys):
+    import database
+    monkeypatch.setattr(database, 'DATABASE', database.DATABASE)
+    legacy = tmp_path / 'legacy.db'
+    # Schema as the app created it before migrations and epoch columns
+    conn = sqlite3.connect(legacy)
+    conn.execute('''CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                    author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL, total_copies INTEGER NOT NULL,
+                    available_copies INTEGER NOT NULL)''')
+    conn.execute('''CREATE TABLE borrow_records (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patron_id TEXT NOT NULL, book_id INTEGER NOT NULL, borrow_date TEXT NOT NULL,
+                    due_date TEXT NOT NULL, return_date TEXT)''')
+    conn.execute("INSERT INTO books VALUES (1, 'Legacy', 'Author', '7777777777772', 1, 0)")
+    conn.execute('''INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
+                    VALUES ('777777', 1, '2029-12-01T10:00:00', '2029-12-15T10:00:00')''')
+    conn.commit()
+    conn.close()
+    output = tmp_path / 'overdue.jsonl'
+    try:
+        assert main(['--database', str(legacy), '--as-of', AS_OF.isoformat(),
+                     '--format', 'jsonl', '--output', str(output)]) == 0
+    finally:
+        database.close_pool()
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [(row['patron_id'], row['overdue_loans']) for row in rows] == [("777777", 1)]
+    assert 'Swept 1 overdue loans' in capsys.readouterr().err